@@ -1,57 +1,98 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from src.apis.routes.data_routes import router as data_router
 from src.apis.routes.chat_routes import router as chat_router
 from src.apis.routes.auth_routes import router as auth_router
 from src.apis.routes.recommendation_routes import router as recommendation_router
+from src.apis.routes.admin_routes import router as admin_router
+from src.services.database_manager.connection import (
+    close_asyncpg_pool,
+    get_async_engine,
+    get_asyncpg_pool,
+    get_engine,
+)
+from src.utils.http_clients import close_http_clients
 from src.utils.logger import get_logger
 
 # --- Setup ---
 logger = get_logger(__name__)
 
+WELCOME_MESSAGE = r"""
+         _____  ___        _____            ___    ____             _                  _    _____ _             _           _ 
+        |  __ \|__ \      |  __ \          |__ \  |  _ \           | |                | |  / ____| |           | |         | |
+        | |__) |  ) |_____| |  | | _____   __ ) | | |_) | __ _  ___| | _____ _ __   __| | | (___ | |_ __ _ _ __| |_ ___  __| |
+        |  _  /  / /______| |  | |/ _ \ \ / // /  |  _ < / _` |/ __| |/ / _ \ '_ \ / _` |  \___ \| __/ _` | '__| __/ _ \/ _` |
+        | | \ \ / /_      | |__| |  __/\ V // /_  | |_) | (_| | (__|   <  __/ | | | (_| |  ____) | || (_| | |  | ||  __/ (_| |
+        |_|  \_\____|     |_____/ \___| \_/|____| |____/ \__,_|\___|_|\_\___|_| |_|\__,_| |_____/ \__\__,_|_|   \__\___|\__,_|                                                                                                                                                                                                                          
+            """
+
+# --- Lifespan Handler ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initializes shared resources on startup and releases them on shutdown."""
+    print_welcome_message()
+    # Create the pooled database engine once so the first request doesn't pay for it.
+    app.state.db_engine = get_engine()
+    app.state.async_db_engine = get_async_engine()
+    app.state.asyncpg_pool = await get_asyncpg_pool()
+    logger.info("FastAPI application startup complete.")
+    yield
+    app.state.db_engine.dispose()
+    await app.state.async_db_engine.dispose()
+    await close_asyncpg_pool()
+    await close_http_clients()
+    logger.info("FastAPI application shutdown complete.")
+
+
 app = FastAPI(
     title="AI Developer Productivity Assistant API",
     description="API endpoints for serving mock data for the assistant.",
     version="0.1.0",
+    lifespan=lifespan,
+    # orjson serializes the dict-heavy payloads of this API considerably faster than stdlib json
+    default_response_class=ORJSONResponse,
 )
 
 # --- CORS Middleware ---
-# In a production app, you would want to be more restrictive with the allowed origins.
+# Only explicitly listed origins are allowed, configurable via a comma-separated CORS_ORIGINS.
 origins = [
-    "http://localhost",
-    "http://localhost:3000",
-    "*", 
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost,http://localhost:3000").split(",")
+    if origin.strip()
 ]
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["authorization", "content-type"],
+    max_age=86400,
 )
 
+# --- GZip Middleware ---
+# Compresses the larger JSON responses; added after CORS so it wraps the CORS middleware.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# --- Exception Handlers ---
+# Unhandled errors are logged once here and answered with a generic 500, so routes only
+# need to raise the HTTPExceptions they mean to send.
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    # The traceback logged by `exception` already includes `exc`
+    logger.exception("Unhandled error on %s %s", request.method, request.url.path)
+    return ORJSONResponse(status_code=500, content={"detail": "An internal server error occurred."})
+
 # --- Welcome Message Function ---
 def print_welcome_message():
     """Logs the ASCII art welcome message."""
-    welcome_message = r"""
-         _____  ___        _____            ___    ____             _                  _    _____ _             _           _ 
-        |  __ \|__ \      |  __ \          |__ \  |  _ \           | |                | |  / ____| |           | |         | |
-        | |__) |  ) |_____| |  | | _____   __ ) | | |_) | __ _  ___| | _____ _ __   __| | | (___ | |_ __ _ _ __| |_ ___  __| |
-        |  _  /  / /______| |  | |/ _ \ \ / // /  |  _ < / _` |/ __| |/ / _ \ '_ \ / _` |  \___ \| __/ _` | '__| __/ _ \/ _` |
-        | | \ \ / /_      | |__| |  __/\ V // /_  | |_) | (_| | (__|   <  __/ | | | (_| |  ____) | || (_| | |  | ||  __/ (_| |
-        |_|  \_\____|     |_____/ \___| \_/|____| |____/ \__,_|\___|_|\_\___|_| |_|\__,_| |_____/ \__\__,_|_|   \__\___|\__,_|                                                                                                                                                                                                                          
-            """
-    # Use the configured logger to print the message
-    logger.info(f"\n{welcome_message}\n") # Add newlines for better spacing in logs
-
-# --- Startup Event Handler ---
-@app.on_event("startup")
-async def startup_event():
-    """Actions to perform on application startup."""
-    print_welcome_message()
-    logger.info("FastAPI application startup complete.") # Optional: Log completion
-
+    # Lazy %-formatting skips building the message when INFO logging is disabled
+    logger.info("\n%s\n", WELCOME_MESSAGE)  # Add newlines for better spacing in logs
 
 # Include the data routes
 app.include_router(data_router, prefix="/data", tags=["Data"])
@@ -65,6 +106,9 @@ app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 # Include the recommendation routes
 app.include_router(recommendation_router, prefix="", tags=["Recommendations"])
 
+# Include the admin routes for long-running document jobs
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
+
 @app.get("/", tags=["Root"])
 async def read_root():
     return {"message": "Welcome to the R2-Dev2 API!"}
@@ -1,50 +1,33 @@
 import os
+import asyncio
 import json
 from pathlib import Path
-from dotenv import load_dotenv
 
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
 from langchain_postgres import PGVector
 
+from src.services.database_manager.connection import get_db_connection_string
+from src.services.embedding_engine.config import (
+    COLLECTION_NAME,
+    INSERT_BATCH_SIZE,
+    create_http_async_client,
+    get_embeddings,
+)
 from src.utils.logger import get_logger
 
 # --- Setup ---
 
-# Load environment variables from both configuration files
-load_dotenv("configs/.env")
-load_dotenv("configs/secrets/.env")
-
 # Initialize logger for this module
 logger = get_logger(__name__)
 SESSION_ID = "learning-embed"
 log_extra = {"session_id": SESSION_ID}
 
-# --- Database Configuration ---
-
-PG_HOST = os.getenv("PG_HOST")
-PG_PORT = os.getenv("PG_PORT")
-PG_DB = os.getenv("PG_DB")
-PG_USER = os.getenv("PG_USER")
-PG_PASSWORD = os.getenv("PG_PASSWORD")  # Password is now optional
-
-if not all([PG_HOST, PG_PORT, PG_DB, PG_USER]):
-    raise ValueError("PG_HOST, PG_PORT, PG_DB, and PG_USER environment variables must be set.")
-
-user_info = PG_USER if PG_USER else ""
-if PG_PASSWORD:
-    user_info += f":{PG_PASSWORD}"
-
-connection = f"postgresql+psycopg://{user_info}@{PG_HOST}:{PG_PORT}/{PG_DB}"
-
 # --- General Configuration ---
 
 LEARNING_FILE_PATH = Path("data/learning.json")
-EMBEDDING_MODEL = "text-embedding-3-large"
-COLLECTION_NAME = "developer_docs"
 
 
-def embed_learning_resources():
+async def embed_learning_resources():
     """
     Reads learning resources from a JSON file, creates Document objects,
     and stores their embeddings in the vector store.
@@ -76,18 +59,22 @@ def embed_learning_resources():
         logger.warning("No learning items found to embed.", extra=log_extra)
         return
 
-    # 2. Initialize embedding model
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    # 2. Initialize embedding model with a shared, keep-alive HTTP client
+    async with create_http_async_client() as http_client:
+        embeddings = get_embeddings(http_client)
+
+        # 3. Add documents to the existing collection in batches, keeping the collection's other contents
+        vector_store = PGVector(
+            embeddings=embeddings,
+            collection_name=COLLECTION_NAME,
+            connection=get_db_connection_string(),
+            use_jsonb=True,
+            pre_delete_collection=False,
+            async_mode=True,
+        )
+        for start in range(0, len(documents_to_add), INSERT_BATCH_SIZE):
+            await vector_store.aadd_documents(documents_to_add[start:start + INSERT_BATCH_SIZE])
 
-    # 3. Add documents to the existing collection in one step
-    PGVector.from_documents(
-        embedding=embeddings,
-        documents=documents_to_add,
-        collection_name=COLLECTION_NAME,
-        connection=connection,
-        use_jsonb=True,
-    )
-    
     logger.info(
         f"Successfully embedded {len(documents_to_add)} learning items into the vector store.",
         extra=log_extra,
@@ -97,9 +84,9 @@ def embed_learning_resources():
 
 if __name__ == "__main__":
     # Example of running with a few sample records for testing
-    # To run with all items, simply call embed_learning_resources()
+    # To run with all items, simply run embed_learning_resources()
     try:
-        embed_learning_resources()
+        asyncio.run(embed_learning_resources())
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}", extra=log_extra, exc_info=True)
         print(f"An error occurred. Check the logs at {os.getenv('LOG_DIRECTORY')}.") 
\ No newline at end of file
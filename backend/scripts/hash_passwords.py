@@ -0,0 +1,40 @@
+from sqlalchemy import text
+
+from src.services.database_manager.connection import get_engine
+from src.utils.logger import get_logger
+from src.utils.passwords import hash_password
+
+# --- Setup ---
+logger = get_logger(__name__)
+LOG_EXTRA = {"session_id": "password-migration"}
+
+
+def migrate_passwords():
+    """
+    Hashes the legacy plaintext `password` of every user that has no `password_hash` yet.
+    Safe to re-run: users that already have a hash are left untouched.
+    """
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS password_hash TEXT"))
+        has_password_column = conn.execute(text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'users' AND column_name = 'password'
+        """)).first()
+        if not has_password_column:
+            logger.info("No plaintext password column found, nothing to migrate.", extra=LOG_EXTRA)
+            return
+
+        rows = conn.execute(text(
+            "SELECT id, password FROM users WHERE password_hash IS NULL AND password IS NOT NULL"
+        )).fetchall()
+        if rows:
+            conn.execute(
+                text("UPDATE users SET password_hash = :password_hash WHERE id = :id"),
+                [{"id": row.id, "password_hash": hash_password(row.password)} for row in rows],
+            )
+    logger.info(f"Hashed passwords for {len(rows)} users.", extra=LOG_EXTRA)
+
+
+if __name__ == "__main__":
+    migrate_passwords()
@@ -1,7 +1,10 @@
 import os
 import uuid
 import random
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
 from dotenv import load_dotenv
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from sqlalchemy import (
     create_engine,
@@ -9,7 +12,8 @@ from sqlalchemy import (
     String,
     Text,
     ForeignKey,
-    ARRAY
+    ARRAY,
+    text,
 )
 from sqlalchemy.orm import sessionmaker, relationship, declarative_base
 from sqlalchemy.dialects.postgresql import UUID
@@ -18,7 +22,9 @@ from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
 
+from src.utils.llm_retry import retry_transient_llm_errors
 from src.utils.logger import get_logger
+from src.utils.passwords import hash_password
 
 # --- Setup ---
 load_dotenv("configs/.env")
@@ -27,8 +33,18 @@ logger = get_logger(__name__)
 
 LOG_EXTRA = {"session_id": "mock-data-seed"}
 
+# Maximum number of items packed into a single LLM generation prompt.
+LLM_BATCH_SIZE = 8
+
+# Maximum number of concurrent LLM generation requests.
+LLM_MAX_WORKERS = 16
+
+# Login password given to every seeded user; only meant for local development.
+MOCK_USER_PASSWORD = os.getenv("MOCK_USER_PASSWORD", "r2dev2-dev")
+
 # --- LLM Setup ---
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.5)
+# Retries are handled by _invoke_llm, with jittered backoff across the concurrent batches
+llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.5, max_retries=0)
 
 # --- SQLAlchemy Setup ---
 Base = declarative_base()
@@ -39,6 +55,8 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, nullable=False, unique=True)
     role = Column(String, nullable=False)
+    # scrypt hash from src.utils.passwords.hash_password; users without one can't log in
+    password_hash = Column(String)
     tickets = relationship("JiraTicket", back_populates="assignee")
     pull_requests = relationship("PullRequest", back_populates="author")
 
@@ -81,6 +99,8 @@ class Document(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     content = Column(Text)
+    # Hash of the content written by the last elaboration run; unchanged documents are skipped
+    content_hash = Column(String)
     type = Column(String)
     project_id = Column(UUID(as_uuid=True), ForeignKey('projects.id'))
     project = relationship("Project", back_populates="documents")
@@ -112,8 +132,21 @@ def get_db_session():
             f"postgresql+psycopg://{os.getenv('PG_USER')}@"
             f"{os.getenv('PG_HOST')}:{os.getenv('PG_PORT')}/{os.getenv('PG_DB')}"
         )
-        engine = create_engine(db_url)
+        # Batch executemany INSERTs into multi-row VALUES statements of up to 1000 rows
+        engine = create_engine(db_url, insertmanyvalues_page_size=1000)
         Base.metadata.create_all(engine)  # Create tables if they don't exist
+        # create_all doesn't add columns to existing tables
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT"))
+            conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS password_hash TEXT"))
+            # Matches the ticket lookups, which filter on assignee and LOWER(status)
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS jira_tickets_user_status ON jira_tickets (assigned_to, LOWER(status))"
+            ))
+            # Trigram indexes let the learning search's ILIKE '%term%' filters use an index scan
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS learnings_title_trgm ON learnings USING gin (title gin_trgm_ops)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS learnings_summary_trgm ON learnings USING gin (summary gin_trgm_ops)"))
         Session = sessionmaker(bind=engine)
         session = Session()
         logger.info("Database session established.", extra=LOG_EXTRA)
@@ -123,23 +156,33 @@ def get_db_session():
         raise
 
 def clear_data(session):
-    """Clears all data from the tables."""
+    """
+    Clears all data from the tables within the caller's transaction.
+    Uses a single TRUNCATE ... CASCADE, which also clears rows in other tables
+    that reference these ones (e.g. chat sessions of the old users).
+    """
     logger.info("Clearing all existing data from tables...", extra=LOG_EXTRA)
-    try:
-        # The order is important, so we reflect and sort tables by dependency.
-        for table in reversed(Base.metadata.sorted_tables):
-            session.execute(table.delete())
-        session.commit()
-        logger.info("All tables cleared successfully.", extra=LOG_EXTRA)
-    except Exception as e:
-        logger.error(f"Failed to clear data: {e}", extra=LOG_EXTRA)
-        session.rollback()
-        raise
+    table_names = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    session.execute(text(f"TRUNCATE TABLE {table_names} CASCADE"))
+    logger.info("All tables cleared successfully.", extra=LOG_EXTRA)
 
 # --- LLM-Powered Data Generation ---
 
-def generate_llm_data(prompt_template, **kwargs):
-    """Uses an LLM to generate data based on a prompt template."""
+@retry_transient_llm_errors(logger)
+def _invoke_llm(chain, inputs):
+    """Invokes an LLM chain, retrying rate limits and other transient API errors."""
+    return chain.invoke(inputs)
+
+# Empty, unparseable or incomplete responses are regenerated a few times before giving up
+retry_bad_llm_output = retry(
+    wait=wait_exponential(),
+    stop=stop_after_attempt(3),
+    retry=retry_if_exception_type(ValueError),
+    reraise=True,
+)
+
+def _generate_llm_data(prompt_template, **kwargs):
+    """Runs one LLM generation; API errors are retried in `_invoke_llm`, bad output raises ValueError."""
     logger.info(f"Generating data with LLM for: {kwargs}", extra=LOG_EXTRA)
     parser = JsonOutputParser()
     prompt = PromptTemplate(
@@ -149,7 +192,7 @@ def generate_llm_data(prompt_template, **kwargs):
     )
     chain = prompt | llm | parser
     try:
-        result = chain.invoke(kwargs)
+        result = _invoke_llm(chain, kwargs)
         if not result:
             raise ValueError("LLM returned empty result")
         return result
@@ -157,9 +200,50 @@ def generate_llm_data(prompt_template, **kwargs):
         logger.error(f"LLM data generation failed: {e}", extra=LOG_EXTRA)
         raise
 
+@retry_bad_llm_output
+def generate_llm_data(prompt_template, **kwargs):
+    """
+    Uses an LLM to generate data based on a prompt template.
+    Empty or unparseable responses are regenerated; API errors are retried in `_invoke_llm`.
+    """
+    return _generate_llm_data(prompt_template, **kwargs)
+
+def generate_llm_batch(prompt_template, items, batch_size=LLM_BATCH_SIZE, **kwargs):
+    """
+    Generates data for many items with one LLM call per batch of items.
+
+    The items are rendered as a numbered list into the `{items}` slot of the prompt,
+    so the shared instructions are only sent once per batch. The LLM must return a
+    JSON list of `{"id": <number>, "output": ...}` objects, which are mapped back to
+    the items by their number. Returns the outputs in the same order as `items`.
+    A batch whose response is malformed or missing items is regenerated as a whole.
+    """
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+
+    @retry_bad_llm_output
+    def generate_batch(batch):
+        numbered_items = "\n".join(f"{i}. {item}" for i, item in enumerate(batch, start=1))
+        result = _generate_llm_data(prompt_template, items=numbered_items, **kwargs)
+
+        try:
+            by_id = {int(entry["id"]): entry["output"] for entry in result}
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"LLM batch response is malformed: {e!r}", extra=LOG_EXTRA)
+            raise ValueError(f"LLM batch response is malformed: {e!r}") from e
+        missing = [i for i in range(1, len(batch) + 1) if i not in by_id]
+        if missing:
+            logger.error(f"LLM batch response is missing items {missing}", extra=LOG_EXTRA)
+            raise ValueError(f"LLM batch response is missing items {missing}")
+        return [by_id[i] for i in range(1, len(batch) + 1)]
+
+    # Batches are independent, so their LLM calls are issued concurrently.
+    with ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS) as executor:
+        batch_outputs = list(executor.map(generate_batch, batches))
+    return [output for outputs in batch_outputs for output in outputs]
+
 # --- Data Generation ---
 def generate_users():
-    """Generates a predefined list of users."""
+    """Generates a predefined list of users, all of whom log in with `MOCK_USER_PASSWORD`."""
     logger.info("Generating predefined user list...", extra=LOG_EXTRA)
     users_data = [
         {'name': 'Steve Rogers', 'email': 'steve.rogers@relanto.ai', 'role': 'developer'},
@@ -170,6 +254,7 @@ def generate_users():
     ]
     for user in users_data:
         user['id'] = str(uuid.uuid4())
+        user['password_hash'] = hash_password(MOCK_USER_PASSWORD)
     return users_data
 
 def generate_projects():
@@ -189,14 +274,23 @@ def generate_jira_tickets(projects, users):
     tickets = []
     devs = [u for u in users if u["role"] == "developer"]
     prompt = """
-    For a software project named '{project_name}', generate {num_tickets} realistic Jira ticket titles and descriptions.
+    For each numbered software project below, generate the requested number of realistic Jira ticket titles and descriptions.
     The tickets should cover a range of tasks including new features, bug fixes, technical debt, and documentation.
-    Return as a JSON list of objects, each with 'title' and 'description' keys.
+
+    Projects:
+    {items}
+
+    Return a JSON list with one object per project, each with an 'id' key (the project number) and an 'output' key
+    containing a list of ticket objects, each with 'title' and 'description' keys.
     {format_instructions}
     """
-    for project in projects:
-        num_tickets = random.randint(10, 15)
-        ticket_data = generate_llm_data(prompt, project_name=project["name"], num_tickets=num_tickets)
+    items = [
+        f"Project '{project['name']}': generate {random.randint(10, 15)} tickets"
+        for project in projects
+    ]
+    # All projects fit in a single call, sharing one copy of the instructions.
+    ticket_batches = generate_llm_batch(prompt, items, batch_size=len(items) or 1)
+    for project, ticket_data in zip(projects, ticket_batches):
         for item in ticket_data:
             tickets.append({
                 "id": str(uuid.uuid4()),
@@ -212,14 +306,24 @@ def generate_pull_requests(tickets, users, projects):
     prs = []
     devs = [u for u in users if u["role"] == "developer"]
     prompt = """
-    For a Jira ticket titled '{ticket_title}', generate a realistic pull request title and a short, one-paragraph summary of the changes.
-    The title should be concise and prefixed with the ticket context, like 'feat:' or 'fix:'.
-    Return as a JSON object with 'title' and 'summary' keys.
+    For each numbered Jira ticket below, generate the requested number of realistic pull requests, each with a title
+    and a short, one-paragraph summary of the changes.
+    The titles should be concise and prefixed with the ticket context, like 'feat:' or 'fix:'.
+
+    Tickets:
+    {items}
+
+    Return a JSON list with one object per ticket, each with an 'id' key (the ticket number) and an 'output' key
+    containing a list of pull request objects, each with 'title' and 'summary' keys.
     {format_instructions}
     """
-    for ticket in tickets:
-        for _ in range(random.randint(1, 2)):
-            pr_data = generate_llm_data(prompt, ticket_title=ticket["title"])
+    items = [
+        f"Ticket '{ticket['title']}': generate {random.randint(1, 2)} pull request(s)"
+        for ticket in tickets
+    ]
+    pr_batches = generate_llm_batch(prompt, items)
+    for ticket, pr_list in zip(tickets, pr_batches):
+        for pr_data in pr_list:
             pr = {
                 "id": str(uuid.uuid4()),
                 "title": pr_data["title"],
@@ -240,16 +344,20 @@ def generate_documents(projects):
     {format_instructions}
     """
     doc_types = ["API Guide", "Onboarding Guide", "Architecture Overview"]
-    for project in projects:
-        for doc_type in doc_types:
-            doc_data = generate_llm_data(prompt, project_name=project["name"], doc_type=doc_type)
-            docs.append({
-                "id": str(uuid.uuid4()),
-                "title": doc_data["title"],
-                "content": doc_data["content"],
-                "type": doc_type,
-                "project_id": project["id"]
-            })
+    combinations = list(product(projects, doc_types))
+    with ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS) as executor:
+        doc_results = list(executor.map(
+            lambda combo: generate_llm_data(prompt, project_name=combo[0]["name"], doc_type=combo[1]),
+            combinations,
+        ))
+    for (project, doc_type), doc_data in zip(combinations, doc_results):
+        docs.append({
+            "id": str(uuid.uuid4()),
+            "title": doc_data["title"],
+            "content": doc_data["content"],
+            "type": doc_type,
+            "project_id": project["id"]
+        })
     return docs
 
 def generate_learnings():
@@ -267,39 +375,41 @@ def generate_learnings():
 def generate_git_diffs(prs):
     diffs = []
     prompt = """
-    For a pull request titled '{pr_title}', generate a realistic, small git diff.
-    The diff should be for a Python file (e.g., `app/utils.py` or `services/logic.py`).
+    For each numbered pull request below, generate the requested number of realistic, small git diffs.
+    Each diff should be for a Python file (e.g., `app/utils.py` or `services/logic.py`).
     It should be plausible for the given PR title and represent a small code change.
-    Return as a JSON object with a single key 'diff_text' containing the diff.
+
+    Pull requests:
+    {items}
+
+    Return a JSON list with one object per pull request, each with an 'id' key (the pull request number) and an
+    'output' key containing a list of diff strings.
     {format_instructions}
     """
-    for pr in prs:
-        for _ in range(random.randint(1, 2)):
-            diff_data = generate_llm_data(prompt, pr_title=pr["title"])
+    items = [
+        f"Pull request '{pr['title']}': generate {random.randint(1, 2)} diff(s)"
+        for pr in prs
+    ]
+    diff_batches = generate_llm_batch(prompt, items)
+    for pr, diff_list in zip(prs, diff_batches):
+        for diff_text in diff_list:
             diffs.append({
                 "id": str(uuid.uuid4()),
-                "diff_text": diff_data["diff_text"],
+                "diff_text": diff_text,
                 "pr_id": pr["id"]
             })
     return diffs
 
 # --- Data Insertion ---
 def insert_data(session, model, data):
-    """Inserts data into the database using SQLAlchemy session."""
+    """Inserts data into the database within the caller's transaction."""
     if not data:
         return
     logger.info(f"Inserting {len(data)} records into {model.__tablename__}...", extra=LOG_EXTRA)
     
     # Ensure all generated IDs are preserved
     session.bulk_insert_mappings(model, data)
-    
-    try:
-        session.commit()
-        logger.info(f"Successfully inserted data into {model.__tablename__}.", extra=LOG_EXTRA)
-    except Exception as e:
-        logger.error(f"Data insertion failed for {model.__tablename__}: {e}", extra=LOG_EXTRA)
-        session.rollback()
-        raise
+    logger.info(f"Successfully inserted data into {model.__tablename__}.", extra=LOG_EXTRA)
 
 # --- Main Execution ---
 def main():
@@ -307,30 +417,29 @@ def main():
     logger.info("Starting mock data population script...", extra=LOG_EXTRA)
     session = get_db_session()
     try:
-        clear_data(session)
-        # Generate Data
+        # Generate all data up front so no transaction is held open during LLM calls
         users_data = generate_users()
         projects_data = generate_projects()
-        
-        # Insert users and projects first to satisfy foreign key constraints
-        insert_data(session, User, users_data)
-        insert_data(session, Project, projects_data)
-        
-        # Pass generated IDs to subsequent generation functions
         jira_tickets_data = generate_jira_tickets(projects_data, users_data)
-        insert_data(session, JiraTicket, jira_tickets_data)
-
         pull_requests_data = generate_pull_requests(jira_tickets_data, users_data, projects_data)
-        insert_data(session, PullRequest, pull_requests_data)
-
         documents_data = generate_documents(projects_data)
-        insert_data(session, Document, documents_data)
-
         learnings_data = generate_learnings()
-        insert_data(session, Learning, learnings_data)
-
         git_diffs_data = generate_git_diffs(pull_requests_data)
-        insert_data(session, GitDiff, git_diffs_data)
+
+        # Clear and insert everything in a single transaction, in foreign key order
+        try:
+            with session.begin():
+                clear_data(session)
+                insert_data(session, User, users_data)
+                insert_data(session, Project, projects_data)
+                insert_data(session, JiraTicket, jira_tickets_data)
+                insert_data(session, PullRequest, pull_requests_data)
+                insert_data(session, Document, documents_data)
+                insert_data(session, Learning, learnings_data)
+                insert_data(session, GitDiff, git_diffs_data)
+        except Exception as e:
+            logger.error(f"Data population failed, transaction rolled back: {e}", extra=LOG_EXTRA)
+            raise
 
         # Print Summary
         print("\\n--- Data Population Summary ---")
@@ -21,6 +21,10 @@ if not all([BASIC_AUTH_USER, BASIC_AUTH_PASS]):
         "BASIC_AUTH_USER and BASIC_AUTH_PASS must be set in your environment for authentication to work."
     )
 
+# Encoded once, so each check only encodes the submitted credentials
+_USER_BYTES = cast(str, BASIC_AUTH_USER).encode("utf-8")
+_PASS_BYTES = cast(str, BASIC_AUTH_PASS).encode("utf-8")
+
 def basic_auth_dependency(credentials: HTTPBasicCredentials = Depends(security)) -> str:
     """
     A reusable dependency for Basic Authentication.
@@ -40,10 +44,11 @@ def basic_auth_dependency(credentials: HTTPBasicCredentials = Depends(security))
              -H "Content-Type: application/json" \\
              -d '{"key": "value"}'
     """
-    correct_user = secrets.compare_digest(credentials.username, cast(str, BASIC_AUTH_USER))
-    correct_pass = secrets.compare_digest(credentials.password, cast(str, BASIC_AUTH_PASS))
+    # Bytes also accept non-ASCII input, and `&` checks both fields so timing doesn't reveal which one failed
+    correct_user = secrets.compare_digest(credentials.username.encode("utf-8"), _USER_BYTES)
+    correct_pass = secrets.compare_digest(credentials.password.encode("utf-8"), _PASS_BYTES)
     
-    if not (correct_user and correct_pass):
+    if not (correct_user & correct_pass):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+from typing import Callable, Dict, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from pydantic import BaseModel
+
+from src.apis.deps.basic_auth import basic_auth_dependency
+from src.services.doc_elaboration.elaborate import run_elaboration
+from src.services.embedding_engine.doc_files import embed_documents
+from src.utils.logger import get_logger
+
+# --- Setup ---
+router = APIRouter()
+logger = get_logger(__name__)
+
+# Status of the jobs started by this process, keyed by task id in start order.
+# Jobs run in-process, so the registry is lost on restart and each worker has its own.
+tasks: Dict[str, Dict[str, Optional[str]]] = {}
+
+# Number of finished (completed or failed) jobs whose status is kept; older ones are evicted.
+MAX_FINISHED_TASKS = 100
+
+# --- Pydantic Models ---
+class TaskAccepted(BaseModel):
+    task_id: str
+    status: str
+
+class TaskStatus(BaseModel):
+    task_id: str
+    job: str
+    status: str
+    error: Optional[str] = None
+
+# --- Background Job Runner ---
+def _evict_finished_tasks() -> None:
+    """Drops the oldest finished jobs beyond `MAX_FINISHED_TASKS`; pending and running jobs are kept."""
+    finished = [task_id for task_id, task in tasks.items() if task["status"] in ("completed", "failed")]
+    for task_id in finished[:-MAX_FINISHED_TASKS]:
+        tasks.pop(task_id, None)
+
+def _run_job(task_id: str, job: Callable) -> None:
+    """
+    Runs an async document-processing job to completion and records its outcome.
+
+    Background tasks defined as plain functions run in the threadpool, so the job
+    gets its own event loop and its blocking steps never stall request handling.
+    """
+    log_extra = {"session_id": task_id}
+    tasks[task_id]["status"] = "running"
+    logger.info(f"Started background job '{tasks[task_id]['job']}'.", extra=log_extra)
+    try:
+        asyncio.run(job())
+        tasks[task_id]["status"] = "completed"
+        logger.info(f"Background job '{tasks[task_id]['job']}' completed.", extra=log_extra)
+    except Exception as e:
+        tasks[task_id]["status"] = "failed"
+        tasks[task_id]["error"] = str(e)
+        logger.error(f"Background job '{tasks[task_id]['job']}' failed: {e}", extra=log_extra, exc_info=True)
+
+def _enqueue_job(background_tasks: BackgroundTasks, job_name: str, job: Callable) -> TaskAccepted:
+    """
+    Registers a job and schedules it to run after the response is sent.
+    Only one job of each name may be pending or running at a time, since concurrent runs
+    would process the same documents twice. The registry is per process, so with several
+    workers this only guards against duplicates started through the same worker.
+    """
+    _evict_finished_tasks()
+    for task_id, task in tasks.items():
+        if task["job"] == job_name and task["status"] in ("pending", "running"):
+            raise HTTPException(
+                status_code=409,
+                detail=f"A '{job_name}' job is already {task['status']} with task id {task_id}.",
+            )
+
+    task_id = str(uuid.uuid4())
+    tasks[task_id] = {"job": job_name, "status": "pending", "error": None}
+    background_tasks.add_task(_run_job, task_id, job)
+    return TaskAccepted(task_id=task_id, status="pending")
+
+# --- API Endpoints ---
+@router.post("/elaborate-docs", response_model=TaskAccepted, status_code=202)
+async def elaborate_docs(background_tasks: BackgroundTasks, user: str = Depends(basic_auth_dependency)):
+    """Starts elaborating all documents with the LLM and returns immediately with a task id."""
+    return _enqueue_job(background_tasks, "elaborate-docs", run_elaboration)
+
+@router.post("/embed-docs", response_model=TaskAccepted, status_code=202)
+async def embed_docs(background_tasks: BackgroundTasks, user: str = Depends(basic_auth_dependency)):
+    """Starts embedding new or changed documentation files and returns immediately with a task id."""
+    return _enqueue_job(background_tasks, "embed-docs", embed_documents)
+
+@router.get("/tasks/{task_id}", response_model=TaskStatus)
+async def get_task_status(task_id: str, user: str = Depends(basic_auth_dependency)):
+    """Returns the status of a background job started by this process."""
+    task = tasks.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found.")
+    return TaskStatus(task_id=task_id, job=str(task["job"]), status=str(task["status"]), error=task["error"])
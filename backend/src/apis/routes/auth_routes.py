@@ -1,10 +1,13 @@
+import asyncio
 from typing import List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 from src.services.database_manager import operations as db_ops
 from src.utils.logger import get_logger
+from src.utils.passwords import verify_password
 
 # --- Setup ---
 router = APIRouter()
@@ -28,41 +31,38 @@ class UserSchema(BaseModel):
 
 # --- API Endpoints ---
 @router.post("/login", response_model=UserResponse)
-def login(request: LoginRequest):
+async def login(request: LoginRequest):
     """
     Authenticate a user and return their details upon successful login.
     """
     log_extra = {"email": request.email}
     logger.info("Login attempt received.", extra=log_extra)
 
-    try:
-        user = db_ops.get_user_by_email_for_auth(request.email)
+    user = await db_ops.aget_user_by_email_for_auth(request.email)
 
-        if not user or user['password'] != request.password:
-            logger.warning("Invalid email or password.", extra=log_extra)
-            raise HTTPException(
-                status_code=401,
-                detail="Invalid email or password",
-            )
-
-        logger.info("Login successful.", extra=log_extra)
-        return UserResponse(
-            user_id=user['id'],
-            name=user['name'],
-            role=user['role']
+    # Hashing is CPU-bound, so it runs off the event loop
+    if not user or not await asyncio.to_thread(verify_password, request.password, user['password_hash']):
+        logger.warning("Invalid email or password.", extra=log_extra)
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid email or password",
         )
-    except Exception as e:
-        logger.error(f"An error occurred during login: {e}", extra=log_extra, exc_info=True)
-        raise HTTPException(status_code=500, detail="An internal server error occurred.")
 
-@router.get("/users", response_model=List[UserSchema])
-def get_all_users():
+    logger.info("Login successful.", extra=log_extra)
+    return UserResponse.model_construct(
+        user_id=user['id'],
+        name=user['name'],
+        role=user['role']
+    )
+
+@router.get("/users", response_model=None, responses={200: {"model": List[UserSchema]}})
+async def get_all_users(
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
     """
     Get a list of all users in the database (for debugging).
     """
-    try:
-        users_data = db_ops.get_all_users()
-        return [UserSchema(**user) for user in users_data]
-    except Exception as e:
-        logger.error(f"Failed to fetch users: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to fetch users.") 
\ No newline at end of file
+    users_data = await db_ops.aget_all_users(limit=limit, offset=offset)
+    # The row dicts already match UserSchema, so they are serialized as-is
+    return ORJSONResponse(users_data)
@@ -1,39 +1,80 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.types import Receive, Scope, Send
 from pydantic import BaseModel, Field
 from typing import Optional, List, Literal
+import asyncio
+import os
 import time
+import uuid
 from datetime import datetime, timezone, timedelta
 
 from src.services.database_manager import operations as db_ops
 
-from src.services.agent.chat import ChatAgent
+from src.services.agent._singleton import get_agent
 from src.utils.logger import get_logger
+from src.utils.sse import sse_event
 from src.apis.deps.basic_auth import basic_auth_dependency
 
 # --- Setup ---
 router = APIRouter()
 logger = get_logger(__name__)
 
-# Initialize the ChatAgent globally to reuse the instance
-# This avoids re-initializing the agent and its models on every request.
-try:
-    agent = ChatAgent()
-    logger.info("ChatAgent initialized successfully for API router.")
-except Exception as e:
-    logger.error(f"Fatal error initializing ChatAgent for API: {e}", exc_info=True)
-    agent = None
+# Indian Standard Time, used for default timestamps and session titles
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# --- Agent Concurrency ---
+# At most AGENT_CONCURRENCY agent runs execute at once. Runs are awaited on the event loop;
+# LangGraph moves any blocking node work to worker threads. Requests that can't get a slot within the queue timeout are
+# rejected with 503 instead of piling up.
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "8"))
+AGENT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("AGENT_QUEUE_TIMEOUT_SECONDS", "10"))
+AGENT_RETRY_AFTER_SECONDS = 5
+
+agent_semaphore = asyncio.Semaphore(AGENT_CONCURRENCY)
+
+async def acquire_agent_slot():
+    """Waits for a free agent slot, raising 503 with Retry-After if none frees up in time."""
+    try:
+        await asyncio.wait_for(agent_semaphore.acquire(), timeout=AGENT_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("All agent slots are busy, rejecting chat request.")
+        raise HTTPException(
+            status_code=503,
+            detail="The assistant is busy, please retry shortly.",
+            headers={"Retry-After": str(AGENT_RETRY_AFTER_SECONDS)},
+        )
+
+class FinalizingStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that always awaits `finalizer` once the response is over.
+
+    Unlike a background task, this also runs when the client disconnects mid-stream (Starlette
+    then skips `background`) and when the stream is never iterated at all. The finalizer is
+    shielded, so it completes even if the request task is cancelled.
+    """
+
+    def __init__(self, content, finalizer, **kwargs):
+        super().__init__(content, **kwargs)
+        self.finalizer = finalizer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await asyncio.shield(self.finalizer())
 
 # --- Pydantic Models ---
 class ChatMessage(BaseModel):
     role: Literal["user", "assistant"] = Field(..., description="The role of the message sender.")
     message: str = Field(..., description="The content of the message.")
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone(timedelta(hours=5, minutes=30))), description="The time the message was created.")
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(IST), description="The time the message was created.")
 
 
 class ChatSession(BaseModel):
     session_id: str = Field(..., description="The unique identifier for the chat session.")
     title: str = Field(..., description="The title of the chat session.")
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone(timedelta(hours=5, minutes=30))), description="The time the session was created.")
+    created_at: datetime = Field(default_factory=lambda: datetime.now(IST), description="The time the session was created.")
 
 class ChatRequest(BaseModel):
     user_id: str = Field(..., description="The unique identifier for the user.")
@@ -55,6 +96,31 @@ class MessageListResponse(BaseModel):
 class RenameSessionRequest(BaseModel):
     new_title: str = Field(..., description="The new title for the chat session.")
 
+async def start_chat_turn(request: ChatRequest) -> tuple[str, list, asyncio.Task]:
+    """
+    Resolves the session and history for a chat request and starts storing the user message.
+
+    The message is stored in a task so the write overlaps with the agent run; callers must
+    await it before storing the reply. A new session has no history and is created together
+    with the user message in one round trip.
+    """
+    session_id = request.session_id
+    if session_id:
+        history = await db_ops.aget_history(session_id)
+        store_user_message = asyncio.create_task(
+            db_ops.astore_message(session_id=session_id, user_id=request.user_id, role='user', message=request.query)
+        )
+    else:
+        session_id = str(uuid.uuid4())
+        history = []
+        title = f"Session - {datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S')}"
+        store_user_message = asyncio.create_task(
+            db_ops.acreate_chat_session_with_message(
+                session_id=session_id, user_id=request.user_id, title=title, message=request.query
+            )
+        )
+    return session_id, history, store_user_message
+
 # --- API Endpoint ---
 @router.post("/agent", response_model=ChatResponse)
 async def chat_with_agent(
@@ -63,41 +129,42 @@ async def chat_with_agent(
     """
     Interact with the LangGraph-based developer assistant.
     """
-    if not agent:
-        logger.error("ChatAgent is not available. The application failed to start correctly.")
+    # The agent is shared by all requests and built on first use
+    try:
+        agent = get_agent()
+    except Exception:
+        logger.error("ChatAgent is not available.")
         raise HTTPException(status_code=500, detail="Agent service is currently unavailable.")
 
+    # Taken before anything is written, so a rejected request leaves no trace
+    await acquire_agent_slot()
     try:
-        session_id = request.session_id
-        # If no session_id is provided, create a new session
-        if not session_id:
-            title = f"Session - {datetime.now(timezone(timedelta(hours=5, minutes=30))).strftime('%Y-%m-%d %H:%M:%S')}"
-            session_id = db_ops.create_chat_session(user_id=request.user_id, title=title)
-        
-        history = db_ops.get_history(session_id) if session_id else []
+        session_id, history, store_user_message = await start_chat_turn(request)
+
         log_extra = {"user_id": request.user_id, "session_id": session_id}
         logger.info(f"Received chat request with query: '{request.query}'", extra=log_extra)
 
-        # Store user message
-        db_ops.store_message(session_id=session_id, user_id=request.user_id, role='user', message=request.query)
-
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Run the agent with the provided details
-        final_response = agent.run(
-            user_query=request.query,
-            user_id=request.user_id,
-            session_id=session_id,
-            history=history
-        )
+        try:
+            final_response = await agent.arun(
+                user_query=request.query,
+                user_id=request.user_id,
+                session_id=session_id,
+                history=history
+            )
+        finally:
+            # The user message must be stored before the reply, and its errors surfaced
+            await store_user_message
 
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         logger.info(f"Agent generated response successfully in {duration:.2f} seconds.", extra=log_extra)
 
         # Store agent response
-        db_ops.store_message(session_id=session_id, user_id=request.user_id, role='assistant', message=final_response)
+        await db_ops.astore_message(session_id=session_id, user_id=request.user_id, role='assistant', message=final_response)
 
-        return ChatResponse(
+        return ChatResponse.model_construct(
             response=final_response,
             session_id=session_id,
             status="success",
@@ -107,71 +174,133 @@ async def chat_with_agent(
     except Exception as e:
         logger.error(f"An error occurred during agent execution: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
+    finally:
+        agent_semaphore.release()
 
-@router.get("/sessions/{user_id}", response_model=SessionListResponse)
-async def get_sessions_for_user(user_id: str):
+@router.post("/agent/stream")
+async def stream_chat_with_agent(
+    request: ChatRequest, user: str = Depends(basic_auth_dependency)
+):
     """
-    Retrieve all chat sessions for a given user.
+    Interact with the developer assistant, streaming the final response as Server-Sent Events.
+
+    Each token arrives as a `data: {"token": ...}` event, followed by an `end` event with the
+    session ID and duration, or an `error` event if the agent fails. The reply is stored once
+    the stream has finished.
     """
     try:
-        sessions_data = db_ops.get_sessions(user_id=user_id)
-        sessions = [ChatSession(**s) for s in sessions_data]
-        return SessionListResponse(sessions=sessions)
+        agent = get_agent()
+    except Exception:
+        logger.error("ChatAgent is not available.")
+        raise HTTPException(status_code=500, detail="Agent service is currently unavailable.")
+
+    await acquire_agent_slot()
+    try:
+        session_id, history, store_user_message = await start_chat_turn(request)
     except Exception as e:
-        logger.error(f"Error fetching sessions for user {user_id}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to fetch chat sessions.")
+        agent_semaphore.release()
+        logger.error(f"An error occurred while starting the chat turn: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
+
+    log_extra = {"user_id": request.user_id, "session_id": session_id}
+    logger.info(f"Received streaming chat request with query: '{request.query}'", extra=log_extra)
+    turn = {"chunks": [], "completed": False, "finish": None}
+
+    async def finish_chat_turn():
+        try:
+            await store_user_message
+            if turn["completed"]:
+                await db_ops.astore_message(
+                    session_id=session_id, user_id=request.user_id, role='assistant', message="".join(turn["chunks"])
+                )
+        except Exception as e:
+            logger.error(f"Failed to store the chat turn: {e}", extra=log_extra, exc_info=True)
+        finally:
+            agent_semaphore.release()
+
+    def finish_task() -> asyncio.Task:
+        # Both the stream and the response finalizer call this; the turn is finished only once,
+        # in a task so a cancelled caller can't interrupt the write or the slot release
+        if turn["finish"] is None:
+            turn["finish"] = asyncio.create_task(finish_chat_turn())
+        return turn["finish"]
+
+    async def event_stream():
+        start_time = time.perf_counter()
+        try:
+            async for token in agent.astream(
+                user_query=request.query,
+                user_id=request.user_id,
+                session_id=session_id,
+                history=history
+            ):
+                turn["chunks"].append(token)
+                yield sse_event({"token": token})
+
+            turn["completed"] = True
+            duration = time.perf_counter() - start_time
+            logger.info(f"Agent streamed response successfully in {duration:.2f} seconds.", extra=log_extra)
+            yield sse_event({"session_id": session_id, "duration_seconds": duration}, event="end")
+        except Exception as e:
+            logger.error(f"An error occurred during agent execution: {e}", extra=log_extra, exc_info=True)
+            yield sse_event({"detail": "An internal error occurred."}, event="error")
+        finally:
+            # Runs when the stream ends, fails or is closed because the client disconnected
+            await asyncio.shield(finish_task())
+
+    return FinalizingStreamingResponse(
+        event_stream(),
+        # Fallback for a response whose stream is never iterated
+        finalizer=finish_task,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+# Unexpected errors in the session endpoints are left to the unhandled-exception handler in main.py.
+# The session and message lists are serialized straight from the DB rows by orjson,
+# which encodes their datetimes natively; the models document the response shape.
+@router.get("/sessions/{user_id}", response_model=None, responses={200: {"model": SessionListResponse}})
+async def get_sessions_for_user(user_id: str):
+    """
+    Retrieve all chat sessions for a given user.
+    """
+    sessions_data = await db_ops.aget_sessions(user_id=user_id)
+    return ORJSONResponse({"sessions": sessions_data})
 
 @router.get("/sessions/{user_id}/last-active", response_model=ChatSession)
 async def get_last_active_session_for_user(user_id: str):
     """
     Retrieve the last active (most recent) chat session for a given user.
     """
-    try:
-        session_data = db_ops.get_last_active_session(user_id)
-        if not session_data:
-            raise HTTPException(status_code=404, detail="No sessions found for this user.")
-        return ChatSession(**session_data)
-    except Exception as e:
-        logger.error(f"Error fetching last active session for user {user_id}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to fetch last active session.")
+    session_data = await db_ops.aget_last_active_session(user_id)
+    if not session_data:
+        raise HTTPException(status_code=404, detail="No sessions found for this user.")
+    return ChatSession.model_construct(**session_data)
 
-@router.get("/sessions/{session_id}/messages", response_model=MessageListResponse)
+@router.get("/sessions/{session_id}/messages", response_model=None, responses={200: {"model": MessageListResponse}})
 async def get_messages_for_session(session_id: str):
     """
     Retrieve all messages for a given chat session.
     """
-    try:
-        messages_data = db_ops.get_messages(session_id=session_id)
-        messages = [ChatMessage(**m) for m in messages_data]
-        return MessageListResponse(messages=messages)
-    except Exception as e:
-        logger.error(f"Error fetching messages for session {session_id}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to fetch chat messages.")
+    messages_data = await db_ops.aget_messages(session_id=session_id)
+    return ORJSONResponse({"messages": messages_data})
 
 @router.put("/sessions/{session_id}/rename", status_code=204)
 async def rename_session(session_id: str, request: RenameSessionRequest):
     """
     Rename a specific chat session.
     """
-    try:
-        success = db_ops.rename_chat_session(session_id, request.new_title)
-        if not success:
-            raise HTTPException(status_code=404, detail="Session not found or title not updated.")
-        return
-    except Exception as e:
-        logger.error(f"Error renaming session {session_id}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to rename chat session.")
+    success = await db_ops.arename_chat_session(session_id, request.new_title)
+    if not success:
+        raise HTTPException(status_code=404, detail="Session not found or title not updated.")
+    return Response(status_code=204)
 
 @router.delete("/sessions/{session_id}", status_code=204)
 async def delete_session(session_id: str, user: str = Depends(basic_auth_dependency)):
     """
     Delete a specific chat session and all its messages.
     """
-    try:
-        success = db_ops.delete_chat_session(session_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Session not found.")
-        return
-    except Exception as e:
-        logger.error(f"Error deleting session {session_id}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Failed to delete chat session.") 
\ No newline at end of file
+    success = await db_ops.adelete_chat_session(session_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return Response(status_code=204)
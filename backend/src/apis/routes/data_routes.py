@@ -1,10 +1,14 @@
-from typing import List, Optional
+import hashlib
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
 from pydantic import BaseModel
 
 from src.services.database_manager import operations as db_ops
-from src.services.pr_summarizer.summarize import PRSummarizer
+from src.services.agent._services import get_pr_summarizer
+from src.utils.sse import sse_event
 
 # --- Pydantic Models ---
 
@@ -56,141 +60,154 @@ class DBLearning(BaseModel):
     tags: List[str]
     urls: List[str]
 
+# Page size bounds for the paginated list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Disable proxy buffering so streamed events reach the client as they are produced
+STREAMING_HEADERS = {"X-Accel-Buffering": "no", "Cache-Control": "no-cache"}
+
+# Documents and learning resources may be reused by the browser for a minute, then revalidated by ETag
+ETAG_CACHE_CONTROL = "private, max-age=60"
+
+def json_response_with_etag(request: Request, data: dict | list) -> Response:
+    """
+    Bandwidth-only conditional GET: returns `data` as JSON with a weak ETag derived from the
+    encoded body, or an empty 304 response if the client's If-None-Match already has that ETag.
+    The tag is only known once `data` has been looked up, so a 304 saves the transfer, not the
+    lookup (which is usually served from the TTL caches anyway).
+    """
+    body = orjson.dumps(data)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # --- API Router Setup ---
 
 router = APIRouter()
-pr_summarizer = PRSummarizer()
 
 # --- API Endpoints ---
+# Unexpected errors are left to the unhandled-exception handler in main.py.
+# List endpoints return the DB rows directly as an ORJSONResponse, skipping model validation
+# and jsonable_encoder; the models are kept as OpenAPI-only hints via `responses`.
+
+TicketStatus = Literal["open", "done", "in progress"]
 
-@router.get("/users/{user_id}/tickets", response_model=List[DBTicket], summary="Get all tickets for a user")
-async def get_user_tickets(user_id: str):
-    try:
-        tickets_data = db_ops.get_tickets_by_user(user_id)
-        return [DBTicket(**t) for t in tickets_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+@router.get("/users/{user_id}/tickets", response_model=None, responses={200: {"model": List[DBTicket]}}, summary="Get tickets for a user, optionally by status")
+async def get_user_tickets(user_id: str, status: Optional[TicketStatus] = None):
+    tickets_data = await db_ops.aget_tickets_by_user(user_id, status=status)
+    return ORJSONResponse(tickets_data)
 
-@router.get("/users/{user_id}/tickets/open", response_model=List[DBTicket], summary="Get open tickets for a user")
+# Status-specific aliases, kept for existing clients; prefer `?status=` on the endpoint above.
+@router.get("/users/{user_id}/tickets/open", response_model=None, responses={200: {"model": List[DBTicket]}}, summary="Get open tickets for a user", deprecated=True)
 async def get_user_open_tickets(user_id: str):
-    try:
-        tickets_data = db_ops.get_tickets_by_user(user_id, status="open")
-        return [DBTicket(**t) for t in tickets_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+    return await get_user_tickets(user_id, status="open")
 
-@router.get("/users/{user_id}/tickets/closed", response_model=List[DBTicket], summary="Get closed/done tickets for a user")
+@router.get("/users/{user_id}/tickets/closed", response_model=None, responses={200: {"model": List[DBTicket]}}, summary="Get closed/done tickets for a user", deprecated=True)
 async def get_user_closed_tickets(user_id: str):
-    try:
-        tickets_data = db_ops.get_tickets_by_user(user_id, status="done")
-        return [DBTicket(**t) for t in tickets_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+    return await get_user_tickets(user_id, status="done")
 
-@router.get("/users/{user_id}/tickets/in-progress", response_model=List[DBTicket], summary="Get in-progress tickets for a user")
+@router.get("/users/{user_id}/tickets/in-progress", response_model=None, responses={200: {"model": List[DBTicket]}}, summary="Get in-progress tickets for a user", deprecated=True)
 async def get_user_in_progress_tickets(user_id: str):
-    try:
-        tickets_data = db_ops.get_tickets_by_user(user_id, status="in progress")
-        return [DBTicket(**t) for t in tickets_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+    return await get_user_tickets(user_id, status="in progress")
 
-@router.get("/tickets/{ticket_id}/pull-requests", response_model=List[DBPullRequest], summary="Get pull requests for a ticket")
+@router.get("/tickets/{ticket_id}/pull-requests", response_model=None, responses={200: {"model": List[DBPullRequest]}}, summary="Get pull requests for a ticket")
 async def get_ticket_pull_requests(ticket_id: str):
-    try:
-        prs_data = db_ops.get_pull_requests_by_ticket(ticket_id)
-        return [DBPullRequest(**pr) for pr in prs_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+    prs_data = await db_ops.aget_pull_requests_by_ticket(ticket_id)
+    return ORJSONResponse(prs_data)
 
 @router.get("/pull-requests/{pr_id}/diff", response_model=GitDiff, summary="Get git diff for a pull request with AI summary")
 async def get_pull_request_diff(pr_id: str):
-    try:
-        diff_data = db_ops.get_diff_by_pr(pr_id)
-        if not diff_data:
-            raise HTTPException(status_code=404, detail="Git diff not found for this PR")
-        
-        summary = pr_summarizer.summarize_diff(diff_data['diff_text'], session_id=f"pr_{pr_id}")
-        diff_data['summary'] = summary
-        return GitDiff(**diff_data)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+    diff_data = await db_ops.aget_diff_by_pr(pr_id)
+    if not diff_data:
+        raise HTTPException(status_code=404, detail="Git diff not found for this PR")
+
+    summary = await get_pr_summarizer().asummarize_diff(diff_data['diff_text'], session_id=f"pr_{pr_id}")
+    # The cached diff row is shared, so the summary goes on a copy
+    return GitDiff.model_construct(**diff_data, summary=summary)
+
+@router.get("/pull-requests/{pr_id}/diff/stream", summary="Stream the git diff for a pull request with its AI summary")
+async def stream_pull_request_diff(pr_id: str):
+    """
+    Streams the diff and its summary as Server-Sent Events: a `diff` event with the diff
+    row, the summary tokens as `data: {"token": ...}` events, then an `end` event, or an
+    `error` event if summarization fails.
+    """
+    diff_data = await db_ops.aget_diff_by_pr(pr_id)
+    if not diff_data:
+        raise HTTPException(status_code=404, detail="Git diff not found for this PR")
+
+    async def event_stream():
+        yield sse_event(diff_data, event="diff")
+        try:
+            async for token in get_pr_summarizer().astream_diff(diff_data['diff_text'], session_id=f"pr_{pr_id}"):
+                yield sse_event({"token": token})
+        except Exception:
+            yield sse_event({"detail": "Could not generate a summary for the provided diff."}, event="error")
+            return
+        yield sse_event({"pr_id": pr_id}, event="end")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=STREAMING_HEADERS)
 
 @router.get("/tickets/{ticket_id}/complete", response_model=TicketWithPRs, summary="Get ticket with associated PRs")
 async def get_ticket_with_prs(ticket_id: str):
-    try:
-        # This endpoint makes two DB calls, which can be optimized later if needed
-        tickets_data = db_ops.get_tickets_by_user(user_id=None, ticket_id=ticket_id) # This needs adjustment in ops
-        if not tickets_data:
-            raise HTTPException(status_code=404, detail="Ticket not found")
-        
-        prs_data = db_ops.get_pull_requests_by_ticket(ticket_id)
-        
-        return TicketWithPRs(
-            ticket=DBTicket(**tickets_data[0]),
-            pull_requests=[DBPullRequest(**pr) for pr in prs_data]
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
-
-@router.get("/docs", response_model=List[DBDocument], summary="Get all documentation")
-async def get_all_docs():
-    try:
-        docs_data = db_ops.get_docs()
-        return [DBDocument(**d) for d in docs_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+    ticket_data = await db_ops.aget_ticket_with_prs(ticket_id)
+    if not ticket_data:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    return TicketWithPRs.model_construct(
+        ticket=DBTicket.model_construct(**ticket_data["ticket"]),
+        pull_requests=[DBPullRequest.model_construct(**pr) for pr in ticket_data["pull_requests"]]
+    )
+
+@router.get("/docs", response_model=None, responses={200: {"model": List[DBDocument]}}, summary="Get all documentation")
+async def get_all_docs(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    docs_data = await db_ops.aget_docs(limit=limit, offset=offset)
+    return json_response_with_etag(request, docs_data)
 
 @router.get("/docs/{doc_id}", response_model=DBDocument, summary="Get a specific document")
-async def get_document(doc_id: str):
-    try:
-        docs_data = db_ops.get_docs(doc_id=doc_id)
-        if not docs_data:
-            raise HTTPException(status_code=404, detail="Document not found")
-        return DBDocument(**docs_data[0])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
-
-@router.get("/projects/{project_id}/docs", response_model=List[DBDocument], summary="Get documents for a project")
-async def get_project_docs(project_id: str):
-    try:
-        docs_data = db_ops.get_docs(project_id=project_id)
-        return [DBDocument(**d) for d in docs_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
-
-@router.get("/learning", response_model=List[DBLearning], summary="Get all learning resources")
-async def get_all_learning():
-    try:
-        learning_data = db_ops.get_learnings()
-        return [DBLearning(**l) for l in learning_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
-
-@router.get("/learning/search", response_model=List[DBLearning], summary="Search learning resources by tag or title")
+async def get_document(doc_id: str, request: Request):
+    docs_data = await db_ops.aget_docs(doc_id=doc_id)
+    if not docs_data:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return json_response_with_etag(request, docs_data[0])
+
+@router.get("/projects/{project_id}/docs", response_model=None, responses={200: {"model": List[DBDocument]}}, summary="Get documents for a project")
+async def get_project_docs(project_id: str, request: Request):
+    docs_data = await db_ops.aget_docs(project_id=project_id)
+    return json_response_with_etag(request, docs_data)
+
+@router.get("/learning", response_model=None, responses={200: {"model": List[DBLearning]}}, summary="Get all learning resources")
+async def get_all_learning(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    learning_data = await db_ops.aget_learnings(limit=limit, offset=offset)
+    return json_response_with_etag(request, learning_data)
+
+@router.get("/learning/search", response_model=None, responses={200: {"model": List[DBLearning]}}, summary="Search learning resources by tag or title")
 async def search_learning_resources(q: Optional[str] = None, tag: Optional[str] = None):
-    try:
-        learning_data = db_ops.get_learnings(q=q, tag=tag)
-        return [DBLearning(**l) for l in learning_data]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+    learning_data = await db_ops.aget_learnings(q=q, tag=tag)
+    return ORJSONResponse(learning_data)
 
 @router.get("/learning/{learning_id}", response_model=DBLearning, summary="Get a specific learning resource")
-async def get_learning_resource(learning_id: str):
-    try:
-        learning_data = db_ops.get_learnings(learning_id=learning_id)
-        if not learning_data:
-            raise HTTPException(status_code=404, detail="Learning resource not found")
-        return DBLearning(**learning_data[0])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+async def get_learning_resource(learning_id: str, request: Request):
+    learning_data = await db_ops.aget_learnings(learning_id=learning_id)
+    if not learning_data:
+        raise HTTPException(status_code=404, detail="Learning resource not found")
+    return json_response_with_etag(request, learning_data[0])
 
 @router.get("/users/{user_id}/info", response_model=DBUser, summary="Get user information")
 async def get_user_info(user_id: str):
-    try:
-        user_data = db_ops.get_user_by_id(user_id)
-        if not user_data:
-            raise HTTPException(status_code=404, detail="User not found")
-        return DBUser(**user_data)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
\ No newline at end of file
+    user_data = await db_ops.aget_user_by_id(user_id)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+    return DBUser.model_construct(**user_data)
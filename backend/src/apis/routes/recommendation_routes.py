@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import time
 
 from src.services.recommendation_engine.service import RecommendationService
@@ -19,6 +21,25 @@ except Exception as e:
     logger.error(f"Fatal error initializing RecommendationService for API: {e}", exc_info=True)
     recommendation_service = None
 
+# Generations in progress, keyed by session ID and message window. Identical requests that
+# arrive while one is running await its result instead of making their own LLM call.
+inflight_recommendations: Dict[Tuple[str, int], asyncio.Future] = {}
+
+async def generate_recommendations_once(session_id: str, num_messages: int) -> List[str]:
+    """Generates recommendations off the event loop, sharing one run between concurrent identical requests."""
+    key = (session_id, num_messages)
+    future = inflight_recommendations.get(key)
+    if future is None:
+        future = asyncio.ensure_future(run_in_threadpool(
+            recommendation_service.generate_recommendations,  # type: ignore[union-attr]
+            session_id=session_id,
+            num_messages=num_messages,
+        ))
+        inflight_recommendations[key] = future
+        future.add_done_callback(lambda _: inflight_recommendations.pop(key, None))
+    # Shielded, so a client disconnecting doesn't cancel the run for the others waiting on it
+    return await asyncio.shield(future)
+
 # --- Pydantic Models ---
 class RecommendationRequest(BaseModel):
     session_id: str = Field(..., description="The session ID to analyze for recommendations.")
@@ -47,20 +68,20 @@ async def get_recommendations(
 
     try:
         log_extra = {"session_id": request.session_id}
-        logger.info(f"Received recommendation request for session {request.session_id} with {request.num_messages} messages.", extra=log_extra)
+        logger.info(
+            "Received recommendation request for session %s with %s messages.",
+            request.session_id, request.num_messages, extra=log_extra,
+        )
 
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Generate recommendations using the service
-        suggestions = recommendation_service.generate_recommendations(
-            session_id=request.session_id,
-            num_messages=request.num_messages or 10
-        )
+        suggestions = await generate_recommendations_once(request.session_id, request.num_messages or 10)
 
-        duration = time.time() - start_time
-        logger.info(f"Generated {len(suggestions)} recommendations in {duration:.2f} seconds.", extra=log_extra)
+        duration = time.perf_counter() - start_time
+        logger.info("Generated %d recommendations in %.2f seconds.", len(suggestions), duration, extra=log_extra)
 
-        return RecommendationResponse(
+        return RecommendationResponse.model_construct(
             suggestions=suggestions,
             session_id=request.session_id,
             status="success",
@@ -68,5 +89,5 @@ async def get_recommendations(
         )
 
     except Exception as e:
-        logger.error(f"An error occurred during recommendation generation: {e}", exc_info=True)
+        logger.error("An error occurred during recommendation generation: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}") 
\ No newline at end of file
@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+from src.services.doc_search.search import VectorSearchService
+from src.services.pr_summarizer.summarize import PRSummarizer
+
+
+@lru_cache(maxsize=1)
+def get_vector_search_service() -> VectorSearchService:
+    """
+    Returns the process-wide VectorSearchService, connecting to the vector store on first use.
+    A failed initialization raises and is not cached, so the next call tries again.
+    """
+    return VectorSearchService()
+
+
+@lru_cache(maxsize=1)
+def get_pr_summarizer() -> PRSummarizer:
+    """
+    Returns the process-wide PRSummarizer, so the agent's tools and the data routes share one
+    model client and one summary cache. A failed initialization raises and is not cached.
+    """
+    return PRSummarizer()
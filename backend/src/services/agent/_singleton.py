@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+from src.services.agent.chat import ChatAgent
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_agent() -> ChatAgent:
+    """
+    Returns the process-wide ChatAgent, building it on first use so that worker
+    startup doesn't pay for the models and graph. A failed initialization raises
+    and is not cached, so the next call tries again.
+    """
+    try:
+        agent = ChatAgent()
+        logger.info("ChatAgent initialized successfully.")
+        return agent
+    except Exception as e:
+        logger.error(f"Fatal error initializing ChatAgent: {e}", exc_info=True)
+        raise
@@ -1,17 +1,22 @@
+import asyncio
+import os
+import re
 import uuid
-import json
+import orjson
 from pathlib import Path
-from typing import TypedDict, Annotated, Hashable, cast, Optional
+from types import MappingProxyType
+from typing import AsyncIterator, TypedDict, Annotated, Hashable, cast, Optional
 
 from dotenv import load_dotenv
-from langchain_core.messages import AnyMessage, HumanMessage, ToolMessage, AIMessage
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage, ToolMessage, AIMessage, trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import InMemorySaver
 
+from src.utils.http_clients import shared_openai_clients
 from src.utils.logger import get_logger
 from src.services.database_manager.connection import get_engine
 from src.services.agent.tools import (
@@ -28,6 +33,68 @@ load_dotenv("configs/.env")
 load_dotenv("configs/secrets/.env")
 logger = get_logger(__name__)
 
+# --- Prompts ---
+# Static instructions always come first and per-turn content last, so consecutive calls
+# share the longest possible prompt prefix for the provider's prompt caching.
+ROUTER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert classifier. Determine if a user's query should be answered by querying a database with SQL or by using other tools. Database queries involve asking for lists, counts, or details about 'tickets', 'bugs', 'features', or 'tasks'. Respond with 'database' or 'general'."),
+    ("human", "{user_query}")
+])
+
+PLANNER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a developer assistant that helps users with their tickets, pull requests, and technical documentation. 
+
+When a user asks about "this" or uses ambiguous references:
+1. Look at the conversation history to understand what they're referring to
+2. If the context is about a specific ticket title or topic, use that as the search query
+3. If unclear, ask for clarification rather than guessing
+
+Available tools:
+- pr_search_tool: Search for pull requests by ticket title, PR title, or description
+- pr_diff_tool: Get git diffs for a specific PR ID  
+- pr_summary_tool: Summarize git diffs
+- doc_search_tool: Search technical documentation
+- learning_search_tool: Search internal learning resources
+
+When searching for PRs, use descriptive search terms from the conversation context."""),
+    MessagesPlaceholder(variable_name="messages")
+])
+
+# The per-turn context (e.g. NL2SQL results) follows the conversation as a trailing system
+# message instead of being interpolated into the system prompt.
+RESPONDER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a helpful assistant. Synthesize a final response for the user based on the conversation history. Be concise and answer the user's question directly.
+
+IMPORTANT: 
+- If a user asks specifically about PRs/pull requests, only provide information about PRs, not tickets
+- If no PRs are found, inform the user that no PRs were found, don't substitute with ticket information
+- Only provide ticket information when the user specifically asks about tickets
+- Use the most recent tool output to answer the user's question"""),
+    MessagesPlaceholder(variable_name="messages"),
+    MessagesPlaceholder(variable_name="context", optional=True),
+])
+
+# --- Routing ---
+# Most queries name what they are about, so keywords decide the route without a model call.
+# PRs, docs and learnings are served by tools, and take precedence when a query mentions both.
+TOOL_QUERY_RE = re.compile(
+    r"\b(prs?|pull[ -]?requests?|diffs?|commits?|docs?|documentation|learnings?)\b", re.IGNORECASE
+)
+DATABASE_QUERY_RE = re.compile(r"\b(tickets?|bugs?|features?|tasks?|jira|sprints?|issues?)\b", re.IGNORECASE)
+# Queries that match neither pattern are classified by the LLM unless this is turned off,
+# in which case they go to the planner.
+ROUTER_LLM_FALLBACK = os.getenv("ROUTER_LLM_FALLBACK", "true").lower() == "true"
+
+# Token budget for the earlier turns the planner sees; the current turn is always kept whole
+PLANNER_HISTORY_MAX_TOKENS = 3000
+
+def prompt_cache_options(config: RunnableConfig) -> dict:
+    """
+    Model call options that pin a session's requests to the same OpenAI prompt cache.
+    Sent via `extra_body`, since the pinned openai SDK predates the `prompt_cache_key` argument.
+    """
+    return {"extra_body": {"prompt_cache_key": config["configurable"]["thread_id"]}}
+
 # --- Agent State ---
 class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], lambda x, y: x + y]
@@ -38,27 +105,37 @@ class AgentState(TypedDict):
     nl2sql_results: Optional[dict]
 
 # --- Agent Class ---
+TOOLS = (
+    pr_diff_tool,
+    pr_summary_tool,
+    doc_search_tool,
+    learning_search_tool,
+    pr_search_tool,
+)
+
 class ChatAgent:
+    # Where the planner's decision leads: any tool name runs the tool executor
+    _TOOL_ROUTE = MappingProxyType(
+        {tool.name: "tool_executor" for tool in TOOLS} | {"generate_response": "generate_response"}
+    )
+
     def __init__(self):
         logger.info("Initializing ChatAgent...")
-        self.tools = [
-            pr_diff_tool,
-            pr_summary_tool,
-            doc_search_tool,
-            learning_search_tool,
-            pr_search_tool,
-        ]
+        self.tools = list(TOOLS)
         self.tool_map = {tool.name: tool for tool in self.tools}
 
         # Model for planning (deciding which tool to use)
-        self.planner_model = ChatOpenAI(model="gpt-4o-mini", temperature=0, streaming=True)
+        self.planner_model = ChatOpenAI(model="gpt-4o-mini", temperature=0, streaming=True, **shared_openai_clients())
         self.planner_model = self.planner_model.bind_tools(self.tools)
 
+        # Model for classifying queries as database or general
+        self.classifier_model = ChatOpenAI(model="gpt-4o-mini", temperature=0, **shared_openai_clients())
+
         # Model for generating the final response
-        self.responder_model = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, streaming=True)
+        self.responder_model = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, streaming=True, **shared_openai_clients())
         
         # Model for SQL generation
-        self.sql_generation_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        self.sql_generation_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, **shared_openai_clients())
 
         # NL2SQL Service
         db_engine = get_engine()
@@ -87,19 +164,23 @@ class ChatAgent:
             }
         )
         
-        tool_executor_map: dict[Hashable, str] = {tool.name: "tool_executor" for tool in self.tools}
-        tool_executor_map["generate_response"] = "generate_response"
+        # LangGraph only accepts a plain dict as the path map
+        tool_route: dict[Hashable, str] = dict(self._TOOL_ROUTE)
         graph.add_conditional_edges(
-            "planner", self.route_tool_action, tool_executor_map
+            "planner", self.route_tool_action, tool_route
         )
         
         graph.add_edge("tool_executor", "planner")
         graph.add_edge("nl2sql_node", "generate_response")
         graph.add_edge("generate_response", END)
 
-        checkpointer = InMemorySaver()
-        runnable = graph.compile(checkpointer=checkpointer)
-        self.save_graph_visualization(runnable)
+        # No checkpointer: each turn starts from the history stored in the database, so
+        # per-node snapshots would only cost serialization and memory. With a saver, the
+        # `messages` reducer would also append that history to the thread's previous state.
+        runnable = graph.compile()
+        # Rendering the diagram is slow and needs extra tooling, so it's opt-in for development
+        if os.getenv("RENDER_GRAPH"):
+            self.save_graph_visualization(runnable)
         return runnable
 
     def save_graph_visualization(self, runnable):
@@ -113,93 +194,74 @@ class ChatAgent:
         except Exception as e:
             logger.warning(f"Failed to draw graph. Is pygraphviz installed? Error: {e}")
 
-    def route_query(self, state: AgentState):
-        last_message = state["messages"][-1].content
-        classifier_model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert classifier. Determine if a user's query should be answered by querying a database with SQL or by using other tools. Database queries involve asking for lists, counts, or details about 'tickets', 'bugs', 'features', or 'tasks'. Respond with 'database' or 'general'."),
-            ("human", "{user_query}")
-        ])
-        chain = prompt | classifier_model | StrOutputParser()
-        result = chain.invoke({"user_query": last_message})
-        is_sql = "database" in result.lower()
-        logger.info(f"Query classified as {'SQL' if is_sql else 'General'}")
+    def route_query(self, state: AgentState, config: RunnableConfig):
+        last_message = str(state["messages"][-1].content)
+        if TOOL_QUERY_RE.search(last_message):
+            is_sql, method = False, "keywords"
+        elif DATABASE_QUERY_RE.search(last_message):
+            is_sql, method = True, "keywords"
+        elif ROUTER_LLM_FALLBACK:
+            chain = ROUTER_PROMPT | self.classifier_model.bind(**prompt_cache_options(config)) | StrOutputParser()
+            result = chain.invoke({"user_query": last_message})
+            is_sql, method = "database" in result.lower(), "LLM"
+        else:
+            is_sql, method = False, "default"
+        logger.info(f"Query classified as {'SQL' if is_sql else 'General'} by {method}")
         return {"messages": state["messages"], "is_sql_query": is_sql}
         
-    def call_planner(self, state: AgentState):
-        # Add system prompt for better tool selection and context handling
-        system_prompt = """You are a developer assistant that helps users with their tickets, pull requests, and technical documentation. 
-
-When a user asks about "this" or uses ambiguous references:
-1. Look at the conversation history to understand what they're referring to
-2. If the context is about a specific ticket title or topic, use that as the search query
-3. If unclear, ask for clarification rather than guessing
-
-Available tools:
-- pr_search_tool: Search for pull requests by ticket title, PR title, or description
-- pr_diff_tool: Get git diffs for a specific PR ID  
-- pr_summary_tool: Summarize git diffs
-- doc_search_tool: Search technical documentation
-- learning_search_tool: Search internal learning resources
-
-When searching for PRs, use descriptive search terms from the conversation context."""
-
-        # Create a prompt template with system message
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            MessagesPlaceholder(variable_name="messages")
-        ])
-        
-        # Chain the prompt with the model
-        chain = prompt | self.planner_model
-        response = chain.invoke({"messages": state["messages"]})
+    def call_planner(self, state: AgentState, config: RunnableConfig):
+        chain = PLANNER_PROMPT | self.planner_model.bind(**prompt_cache_options(config))
+        response = chain.invoke({"messages": self._planner_messages(state["messages"])})
         return {"messages": [response]}
 
-    def generate_response_node(self, state: AgentState):
-        system_template = """You are a helpful assistant. Synthesize a final response for the user based on the conversation history. Be concise and answer the user's question directly.
-
-IMPORTANT: 
-- If a user asks specifically about PRs/pull requests, only provide information about PRs, not tickets
-- If no PRs are found, inform the user that no PRs were found, don't substitute with ticket information
-- Only provide ticket information when the user specifically asks about tickets
-- Use the most recent tool output to answer the user's question
-
-{context}"""
+    def _planner_messages(self, messages: list[AnyMessage]) -> list[AnyMessage]:
+        """
+        Returns the messages for the planner: the current turn in full, after the most recent
+        earlier turns that fit in PLANNER_HISTORY_MAX_TOKENS, so long sessions don't grow its prompt.
+        """
+        turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        history = trim_messages(
+            messages[:turn_start],
+            max_tokens=PLANNER_HISTORY_MAX_TOKENS,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+        )
+        return history + messages[turn_start:]
 
+    def generate_response_node(self, state: AgentState, config: RunnableConfig):
         nl2sql_results = state.get("nl2sql_results")
         context_string = ""
 
         if nl2sql_results:
-            # Format the SQL results as a string to be injected into the prompt.
-            context_string = f"\\nHere is some context from a database query that was run to help answer the user's question. Use this to formulate your response:\\n\\n{json.dumps(nl2sql_results, indent=2, default=str)}"
+            # Format the SQL results as compact JSON to be injected into the prompt; indentation only costs tokens.
+            context_string = f"Here is some context from a database query that was run to help answer the user's question. Use this to formulate your response:\n\n{orjson.dumps(nl2sql_results, default=str).decode()}"
         elif any(isinstance(m, ToolMessage) for m in state["messages"]):
             # For the regular tool path, the tool output is already in the message history.
-            context_string = "\\nThe most recent tool output contains the answer to the user's question. Use only that information to respond."
+            context_string = "The most recent tool output contains the answer to the user's question. Use only that information to respond."
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_template),
-            MessagesPlaceholder(variable_name="messages")
-        ])
-        
-        chain = prompt | self.responder_model
+        chain = RESPONDER_PROMPT | self.responder_model.bind(**prompt_cache_options(config))
         response = chain.invoke({
             "messages": state["messages"],
-            "context": context_string
+            "context": [SystemMessage(content=context_string)] if context_string else [],
         })
         return {"messages": [response]}
 
-    def call_tool_executor(self, state: AgentState):
+    async def call_tool_executor(self, state: AgentState):
         last_message = state["messages"][-1]
         if not isinstance(last_message, AIMessage) or not last_message.tool_calls:
             return {}
 
-        tool_call = last_message.tool_calls[0]
-        tool_args = tool_call["args"]
-        if state.get("user_id"):
-            tool_args["user_id"] = state["user_id"]
-        
-        observation = self.tool_map[tool_call["name"]].invoke(tool_args)
-        return {"messages": [ToolMessage(content=str(observation), tool_call_id=tool_call["id"])]}
+        # The planner may request several tools at once; they run concurrently
+        user_args = {"user_id": state["user_id"]} if state.get("user_id") else {}
+        observations = await asyncio.gather(*(
+            self.tool_map[tool_call["name"]].ainvoke({**tool_call["args"], **user_args})
+            for tool_call in last_message.tool_calls
+        ))
+        return {"messages": [
+            ToolMessage(content=str(observation), tool_call_id=tool_call["id"])
+            for tool_call, observation in zip(last_message.tool_calls, observations)
+        ]}
 
     def route_tool_action(self, state: AgentState) -> str:
         last_message = state["messages"][-1]
@@ -207,7 +269,7 @@ IMPORTANT:
             return "generate_response"
         return last_message.tool_calls[0]["name"]
 
-    def run(self, user_query: str, user_id: str, session_id: str, history: list[AnyMessage] | None = None):
+    def _initial_state(self, user_query: str, user_id: str, session_id: str, history: list[AnyMessage] | None):
         session_id = session_id or str(uuid.uuid4())
         config: RunnableConfig = {"configurable": {"thread_id": session_id}}
 
@@ -221,11 +283,25 @@ IMPORTANT:
             "selected_ticket_id": None,
             "selected_project_id": None,
         }
-        
-        final_state = self.graph.invoke(cast(AgentState, initial_state), config=config)
+        return cast(AgentState, initial_state), config
+
+    async def arun(self, user_query: str, user_id: str, session_id: str, history: list[AnyMessage] | None = None):
+        """Runs the graph and returns the final response, without holding a thread while waiting on I/O."""
+        initial_state, config = self._initial_state(user_query, user_id, session_id, history)
+        final_state = await self.graph.ainvoke(initial_state, config=config)
         return final_state['messages'][-1].content
 
-if __name__ == "__main__":
+    async def astream(
+        self, user_query: str, user_id: str, session_id: str, history: list[AnyMessage] | None = None
+    ) -> AsyncIterator[str]:
+        """Runs the graph and yields the final response token by token, as the responder model generates it."""
+        initial_state, config = self._initial_state(user_query, user_id, session_id, history)
+        async for chunk, metadata in self.graph.astream(initial_state, config=config, stream_mode="messages"):
+            # Only the responder's tokens form the answer; planner and classifier output is internal
+            if metadata.get("langgraph_node") == "generate_response" and chunk.content:
+                yield str(chunk.content)
+
+async def main():
     agent = ChatAgent()
     test_user_id = "fcb7fd5e-4942-4385-96cc-6765a3c1f553" # Vito Corleone
     
@@ -237,7 +313,7 @@ if __name__ == "__main__":
     prompt1 = "What are my open Jira tickets?"
     print(f"\\n--- Turn 1 ---")
     print(f"Input: {prompt1}")
-    response1 = agent.run(prompt1, user_id=test_user_id, session_id=thread_id)
+    response1 = await agent.arun(prompt1, user_id=test_user_id, session_id=thread_id)
     print(f"Output: {response1}")
     print("-" * 20)
 
@@ -252,6 +328,9 @@ if __name__ == "__main__":
         AIMessage(content=response1),
     ]
     
-    response2 = agent.run(prompt2, user_id=test_user_id, session_id=thread_id, history=history)
+    response2 = await agent.arun(prompt2, user_id=test_user_id, session_id=thread_id, history=history)
     print(f"Output: {response2}")
-    print("-" * 20) 
\ No newline at end of file
+    print("-" * 20) 
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,6 @@
+import hashlib
 import json
+import re
 from typing import TypedDict, Annotated, Optional, cast
 
 from dotenv import load_dotenv
@@ -10,6 +12,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.language_models import BaseLanguageModel
 
+from src.utils.cache import TTLCache
 from src.utils.logger import get_logger
 from src.services.database_manager.connection import get_engine
 
@@ -18,6 +21,65 @@ load_dotenv("configs/.env")
 load_dotenv("configs/secrets/.env")
 logger = get_logger(__name__)
 
+# --- Query Cache ---
+# Generated SQL takes the user as the :user_id parameter, so a result can be reused for any
+# user asking the same question; only the LLM call is skipped, the SQL always runs again.
+nl2sql_cache = TTLCache(ttl_seconds=3600, max_size=1024)
+
+# Words that don't change which SQL a question needs. Negations, quantities and status words
+# are deliberately absent.
+SIGNATURE_STOPWORDS = frozenset({
+    "a", "an", "the", "please", "can", "could", "would", "you", "show", "list", "give", "get",
+    "find", "tell", "me", "my", "i", "what", "which", "are", "is", "of", "for", "to", "all",
+})
+SIGNATURE_TOKEN_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[a-z0-9']+")
+
+def query_signature(user_query: str) -> tuple[str, ...]:
+    """
+    Normalizes a question into its meaningful tokens, in order, so paraphrases that differ
+    only in case, punctuation or filler words share a cache entry. UUIDs are kept whole.
+    """
+    tokens = SIGNATURE_TOKEN_RE.findall(user_query.lower())
+    return tuple(token for token in tokens if token not in SIGNATURE_STOPWORDS)
+
+# --- Generated SQL Validation ---
+# Generated SQL is checked before it reaches the database: one read-only statement that
+# binds :user_id, so RBAC can't be skipped. String literals, quoted identifiers and comments
+# are blanked out first, so a search for e.g. '%update%' isn't mistaken for a write and a
+# `-- :user_id` comment doesn't count as binding the user.
+SQL_LITERAL_OR_COMMENT_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/", re.DOTALL)
+SQL_READ_STATEMENT_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# A single SELECT/WITH statement can only write through a data-modifying CTE or main
+# statement, SELECT ... INTO, or a row-locking FOR UPDATE/SHARE clause. DDL and utility
+# keywords (DROP, LOCK, CALL, ...) can't occur in it other than as identifiers, so they
+# aren't matched and columns with those names stay usable.
+SQL_WRITE_RE = re.compile(r"\b(insert|update|delete|merge|into)\b|\bfor\s+(key\s+)?share\b", re.IGNORECASE)
+SQL_USER_PARAM_RE = re.compile(r"(?<!:):user_id\b")
+
+def _blank_literal_or_comment(match: re.Match) -> str:
+    token = match.group()
+    if token[0] in "'\"":
+        return token[0] * 2
+    return " "
+
+def validate_generated_sql(query: str) -> Optional[str]:
+    """Returns why a generated query may not be run, or None if it passes the allowlist."""
+    statement = SQL_LITERAL_OR_COMMENT_RE.sub(_blank_literal_or_comment, query).strip().removesuffix(";")
+    if ";" in statement:
+        return "only a single statement is allowed"
+    if not SQL_READ_STATEMENT_RE.match(statement):
+        return "only SELECT queries are allowed"
+    if SQL_WRITE_RE.search(statement):
+        return "the query must not modify data"
+    if not SQL_USER_PARAM_RE.search(statement):
+        return "the query must be restricted to the current user with :user_id"
+    return None
+
+# --- Queries ---
+# Used by the manual test below to pick a user and one of their tickets.
+TEST_USER_QUERY = text("SELECT id FROM users LIMIT 1")
+TEST_TICKET_QUERY = text("SELECT id FROM jira_tickets WHERE assigned_to = :user_id LIMIT 1")
+
 # --- State Definition for Type Hinting ---
 class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], lambda x, y: x + y]
@@ -38,8 +100,17 @@ class NL2SQLService:
 
     def __init__(self, llm: BaseLanguageModel, db_engine: Engine):
         self.db_engine = db_engine
-        self.output_parser = llm.with_structured_output(NL2SQLResult)
+        # The raw message is kept alongside the parsed result for its token usage
+        self.output_parser = llm.with_structured_output(NL2SQLResult, include_raw=True)
         self.system_prompt = self._create_system_prompt()
+        # Part of every cache key, so SQL generated from a different prompt is never reused
+        self._prompt_version = hashlib.blake2b(self.system_prompt.encode("utf-8"), digest_size=8).hexdigest()
+        # The prompt and chain don't depend on the query, so they are built once
+        self._prompt = ChatPromptTemplate.from_messages([
+            ("system", self.system_prompt),
+            ("human", "{user_query}")
+        ])
+        self._chain = self._prompt | self.output_parser
 
     def _create_system_prompt(self) -> str:
         """Creates the system prompt with schema, guidelines, and few-shot examples."""
@@ -96,6 +167,18 @@ Human: List PRs for ticket '123e4567-e89b-12d3-a456-426614174000'
 Assistant: SELECT pr.id, pr.status, pr.created_at FROM pull_requests pr JOIN jira_tickets jt ON pr.ticket_id = jt.id WHERE jt.id = '123e4567-e89b-12d3-a456-426614174000' AND jt.assigned_to = :user_id
 """
 
+    def _log_token_usage(self, message: AnyMessage, log_extra: dict) -> None:
+        """Logs how much of the prompt the provider served from its prompt cache."""
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return
+        details = usage.get("input_token_details", {})
+        logger.info(
+            f"NL2SQL prompt used {usage['input_tokens']} input tokens, "
+            f"{details.get('cache_read', 0)} read from cache, {details.get('cache_creation', 0)} written to cache.",
+            extra=log_extra,
+        )
+
     def __call__(self, state: AgentState) -> dict:
         """
         The main entry point for the NL2SQL node.
@@ -106,15 +189,24 @@ Assistant: SELECT pr.id, pr.status, pr.created_at FROM pull_requests pr JOIN jir
         log_extra = {"user_id": user_id, "session_id": "nl2sql_node"}
         logger.info(f"Received NL2SQL query: '{user_query}'", extra=log_extra)
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self.system_prompt),
-            ("human", "{user_query}")
-        ])
-        
-        chain = prompt | self.output_parser
-        nl2sql_result = cast(NL2SQLResult, chain.invoke({"user_query": user_query}))
-
-        logger.info(f"Generated SQL: {nl2sql_result.query}", extra=log_extra)
+        cache_key = (self._prompt_version, query_signature(str(user_query)))
+        nl2sql_result = nl2sql_cache.get(cache_key)
+        if nl2sql_result is None:
+            output = self._chain.invoke({"user_query": user_query})
+            if output["parsed"] is None:
+                raise output["parsing_error"] or ValueError("The model returned no SQL query.")
+            nl2sql_result = cast(NL2SQLResult, output["parsed"])
+            self._log_token_usage(output["raw"], log_extra)
+            logger.info(f"Generated SQL: {nl2sql_result.query}", extra=log_extra)
+
+            # Rejected queries never reach the database, nor the cache
+            rejection = validate_generated_sql(nl2sql_result.query)
+            if rejection:
+                logger.warning(f"Rejected generated SQL: {rejection}", extra=log_extra)
+                return {"nl2sql_results": {"error": f"Error: The generated SQL query was rejected: {rejection}."}}
+            nl2sql_cache.set(cache_key, nl2sql_result)
+        else:
+            logger.info(f"Reusing cached SQL for an equivalent query: {nl2sql_result.query}", extra=log_extra)
 
         with self.db_engine.connect() as connection:
             try:
@@ -122,9 +214,11 @@ Assistant: SELECT pr.id, pr.status, pr.created_at FROM pull_requests pr JOIN jir
                 results = connection.execute(
                     text(nl2sql_result.query),
                     {"user_id": user_id}
-                ).mappings().all()
-                
-                query_results = [dict(row) for row in results]
+                ).mappings()
+
+                # Plain dicts, built straight off the cursor: the results are kept in the graph
+                # state and serialized with orjson, which doesn't accept RowMapping
+                query_results = [{**row} for row in results]
                 logger.info(f"SQL query returned {len(query_results)} results.", extra=log_extra)
                 
                 # Create a dictionary of results
@@ -138,6 +232,8 @@ Assistant: SELECT pr.id, pr.status, pr.created_at FROM pull_requests pr JOIN jir
 
             except Exception as e:
                 logger.error(f"Failed to execute SQL query: {e}", extra=log_extra, exc_info=True)
+                # Don't serve broken SQL again; the next ask regenerates it
+                nl2sql_cache.delete(cache_key)
                 error_response = {
                     "error": f"Error: Failed to execute SQL query. Please check your query or the database. Details: {str(e)}",
                 }
@@ -155,13 +251,10 @@ if __name__ == "__main__":
     test_ticket_id = None
     try:
         with engine.connect() as connection:
-            user_result = connection.execute(text("SELECT id FROM users LIMIT 1")).first()
+            user_result = connection.execute(TEST_USER_QUERY).first()
             if user_result:
                 test_user_id = str(user_result[0])
-                ticket_result = connection.execute(
-                    text("SELECT id FROM jira_tickets WHERE assigned_to = :user_id LIMIT 1"),
-                    {"user_id": test_user_id}
-                ).first()
+                ticket_result = connection.execute(TEST_TICKET_QUERY, {"user_id": test_user_id}).first()
                 if ticket_result:
                     test_ticket_id = str(ticket_result[0])
     except Exception as e:
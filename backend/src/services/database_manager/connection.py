@@ -1,20 +1,70 @@
 import os
+import threading
+import asyncpg
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 # --- Setup ---
 load_dotenv("configs/.env")
 load_dotenv("configs/secrets/.env")
 
+# Connection pool settings for the sync engine, also the base for the async one: keep enough connections
+# for concurrent requests, drop stale ones before use, and recycle them every 30 minutes.
+# LIFO checkout reuses the most recently returned (warm) connections and lets surplus
+# ones sit idle until they are recycled.
+POOL_SETTINGS = {
+    "pool_size": 20,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+    "pool_use_lifo": True,
+}
+# The async engine serves most request handlers and gets more burst headroom; the sync
+# engine only serves the agent, the remaining sync operations and scripts.
+ASYNC_POOL_SETTINGS = {**POOL_SETTINGS, "max_overflow": 20}
+# Size of the raw asyncpg pool used for the hottest point queries
+ASYNCPG_POOL_MAX_SIZE = 10
+# Together, one worker opens at most 30 (sync) + 40 (async) + 10 (asyncpg) = 80 connections,
+# so running several workers needs PostgreSQL's max_connections (default 100) raised or a
+# pooler such as PgBouncer in front.
+
+# Compiled statements kept per engine (SQLAlchemy's default is 500). Besides our fixed
+# queries, the agent's NL2SQL statements often repeat verbatim for common questions.
+QUERY_CACHE_SIZE = 1200
+
+# Session settings for every connection. Our queries are short point lookups and small
+# joins, where JIT compilation costs far more than it saves whenever the planner
+# overestimates row counts.
+SERVER_SETTINGS = {"jit": "off"}
+
+# psycopg connection options for the sync engine. After `prepare_threshold` executions of
+# the same statement on a connection, psycopg prepares it server-side, so repeats of our
+# fixed queries and of common NL2SQL queries skip parsing and planning. 5 is psycopg's
+# default, pinned here so it stays on.
+PSYCOPG_CONNECT_ARGS = {
+    "prepare_threshold": 5,
+    "options": " ".join(f"-c {name}={value}" for name, value in SERVER_SETTINGS.items()),
+}
+# asyncpg takes the same settings directly
+ASYNCPG_CONNECT_ARGS = {"server_settings": SERVER_SETTINGS}
+
 # Singleton pattern for the engine
 _engine: Engine | None = None
 _session_maker: sessionmaker[Session] | None = None
+_async_engine: AsyncEngine | None = None
+_async_session_maker: async_sessionmaker[AsyncSession] | None = None
+_asyncpg_pool: asyncpg.Pool | None = None
+# Agent runs and threadpool handlers may ask for the sync engine concurrently
+_engine_lock = threading.Lock()
 
 
-def get_db_connection_string(driver: str = "psycopg") -> str:
+def get_db_connection_string(driver: str | None = "psycopg") -> str:
     """
     Constructs the database connection string from environment variables.
+    With `driver=None` a plain `postgresql://` URL is returned, as expected by asyncpg.
     """
     password = os.getenv("PG_PASSWORD")
     user = os.getenv("PG_USER")
@@ -31,27 +81,27 @@ def get_db_connection_string(driver: str = "psycopg") -> str:
     if password:
         user_info += f":{password}"
 
-    return f"postgresql+{driver}://{user_info}@{host}:{port}/{dbname}"
+    scheme = f"postgresql+{driver}" if driver else "postgresql"
+    return f"{scheme}://{user_info}@{host}:{port}/{dbname}"
 
 
 def get_engine() -> Engine:
     """
-    Establishes a connection to the PostgreSQL database and returns a SQLAlchemy Engine.
-    Uses a singleton pattern to ensure only one engine is created.
+    Returns the SQLAlchemy Engine for the PostgreSQL database; no connection is opened until first use.
+    Uses a singleton pattern to ensure only one engine is created, even across threads.
     """
     global _engine
     if _engine is None:
-        try:
-            db_url = get_db_connection_string()
-            _engine = create_engine(db_url)
-
-            # Test connection to ensure it's valid
-            with _engine.connect() as connection:
-                print("Database engine created and connection successful.")
-
-        except Exception as e:
-            print(f"Database connection failed: {e}")
-            raise
+        with _engine_lock:
+            if _engine is None:
+                # No test connection here: connecting happens on first use, and pool_pre_ping
+                # validates each pooled connection before it is handed out
+                _engine = create_engine(
+                    get_db_connection_string(),
+                    connect_args=PSYCOPG_CONNECT_ARGS,
+                    query_cache_size=QUERY_CACHE_SIZE,
+                    **POOL_SETTINGS,
+                )
 
     return _engine
 
@@ -91,7 +141,63 @@ def get_db_session() -> Session:
     """
     global _session_maker
     if _session_maker is None:
-        engine = get_engine()
-        _session_maker = sessionmaker(bind=engine)
+        # Racing threads build equivalent session makers over the same engine, so no lock is needed
+        _session_maker = sessionmaker(bind=get_engine(), autoflush=False, expire_on_commit=False)
+
+    return _session_maker() 
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Returns the SQLAlchemy AsyncEngine used by async request handlers.
+    Uses a singleton pattern so all handlers share one connection pool.
+    """
+    global _async_engine
+    if _async_engine is None:
+        # asyncpg speaks the binary protocol and caches prepared statements per connection,
+        # which suits the many small point reads made by the request handlers
+        _async_engine = create_async_engine(
+            get_db_connection_string(driver="asyncpg"),
+            connect_args=ASYNCPG_CONNECT_ARGS,
+            query_cache_size=QUERY_CACHE_SIZE,
+            **ASYNC_POOL_SETTINGS,
+        )
+
+    return _async_engine
+
+
+def get_async_db_session() -> AsyncSession:
+    """
+    Returns a new async database session, to be used as `async with get_async_db_session() as session:`.
+    Initializes the async session maker if it hasn't been already.
+    """
+    global _async_session_maker
+    if _async_session_maker is None:
+        _async_session_maker = async_sessionmaker(bind=get_async_engine(), expire_on_commit=False)
+
+    return _async_session_maker()
+
+
+async def get_asyncpg_pool() -> asyncpg.Pool:
+    """
+    Returns a raw asyncpg connection pool for the hottest point queries.
+
+    asyncpg prepares each statement once per connection and reuses it from its statement
+    cache, so repeated queries skip parsing and planning. The pool is created at app
+    startup, so concurrent first calls can't race to create it.
+    """
+    global _asyncpg_pool
+    if _asyncpg_pool is None:
+        _asyncpg_pool = await asyncpg.create_pool(
+            dsn=get_db_connection_string(driver=None), min_size=1, max_size=ASYNCPG_POOL_MAX_SIZE, server_settings=SERVER_SETTINGS
+        )
+
+    return _asyncpg_pool
+
 
-    return _session_maker() 
\ No newline at end of file
+async def close_asyncpg_pool() -> None:
+    """Closes the asyncpg pool, if it was created."""
+    global _asyncpg_pool
+    if _asyncpg_pool is not None:
+        await _asyncpg_pool.close()
+        _asyncpg_pool = None
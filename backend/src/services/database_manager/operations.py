@@ -3,24 +3,123 @@ from typing import List, Literal, Optional
 from sqlalchemy import text
 from langchain_core.messages import HumanMessage, AIMessage, AnyMessage
 
-from src.services.database_manager.connection import get_db_session
+from src.services.database_manager.connection import (
+    get_async_db_session,
+    get_async_engine,
+    get_asyncpg_pool,
+    get_db_session,
+)
+from src.utils.cache import TTLCache, cached
 from src.utils.logger import get_logger
 
 
 logger = get_logger(__name__)
 
+# --- Caches ---
+# Users rarely change, and session lists are invalidated whenever a session is
+# created, renamed or deleted; the TTLs bound staleness from writes made elsewhere.
+# Login lookups carry the password hash, so a changed password must take effect quickly
+user_by_email_cache = TTLCache(ttl_seconds=60, max_size=10_000)
+user_by_id_cache = TTLCache(ttl_seconds=600)
+sessions_cache = TTLCache(ttl_seconds=30)
+# Documents, learning resources and tickets are read-heavy and change rarely; keyed by the query arguments.
+docs_cache = TTLCache(ttl_seconds=120, max_size=256)
+learnings_cache = TTLCache(ttl_seconds=120, max_size=256)
+tickets_cache = TTLCache(ttl_seconds=60, max_size=1024)
+# A PR's diff never changes once stored
+diffs_cache = TTLCache(ttl_seconds=3600, max_size=512)
+
+# --- Prepared Statements ---
+# Run through asyncpg, which prepares them once per pooled connection.
+LOGIN_USER_QUERY = "SELECT id::text AS id, name, role, password_hash FROM users WHERE email = $1"
+
+# --- Queries ---
+# Static statements are built once; SQLAlchemy caches their compiled form by identity.
+# UUID columns are cast to text in SQL, so rows come back ready to serialize.
+CREATE_SESSION_QUERY = text("INSERT INTO chat_sessions (user_id, title) VALUES (:user_id, :title) RETURNING id::text")
+INSERT_MESSAGE_QUERY = text("INSERT INTO chat_messages (session_id, user_id, role, message) VALUES (:session_id, :user_id, :role, :message)")
+CREATE_SESSION_WITH_MESSAGE_QUERY = text("""
+    WITH new_session AS (
+        INSERT INTO chat_sessions (id, user_id, title) VALUES (:session_id, :user_id, :title)
+        RETURNING id, user_id
+    )
+    INSERT INTO chat_messages (session_id, user_id, role, message)
+    SELECT id, user_id, 'user', :message FROM new_session
+""")
+SESSIONS_BY_USER_QUERY = text("SELECT id::text as session_id, title, created_at FROM chat_sessions WHERE user_id = :user_id ORDER BY created_at DESC")
+MESSAGES_BY_SESSION_QUERY = text("SELECT role, message, created_at as timestamp FROM chat_messages WHERE session_id = :session_id ORDER BY created_at ASC")
+TICKET_WITH_PRS_QUERY = text("""
+    SELECT jt.id::text AS id, jt.title, jt.description, jt.status,
+           jt.project_id::text AS project_id, jt.assigned_to::text AS assigned_to, p.name as project_name,
+           pr.id::text as pr_id, pr.title as pr_title, pr.summary as pr_summary,
+           pr.author_id::text as pr_author_id, pr.project_id::text as pr_project_id
+    FROM jira_tickets jt
+    JOIN projects p ON jt.project_id = p.id
+    LEFT JOIN pull_requests pr ON pr.ticket_id = jt.id
+    WHERE jt.id = :ticket_id
+    ORDER BY pr.title
+""")
+PRS_BY_TICKET_QUERY = text("""
+    SELECT id::text AS id, title, summary, ticket_id::text AS ticket_id,
+           author_id::text AS author_id, project_id::text AS project_id
+    FROM pull_requests
+    WHERE ticket_id = :ticket_id
+    ORDER BY title
+""")
+DIFF_BY_PR_QUERY = text("SELECT id::text AS id, diff_text, pr_id::text AS pr_id FROM git_diffs WHERE pr_id = :pr_id")
+USER_BY_ID_QUERY = text("SELECT id::text AS id, name, email, role FROM users WHERE id = :user_id")
+RENAME_SESSION_QUERY = text("UPDATE chat_sessions SET title = :new_title WHERE id = :session_id RETURNING user_id::text")
+DELETE_SESSION_MESSAGES_QUERY = text("DELETE FROM chat_messages WHERE session_id = :session_id")
+DELETE_SESSION_QUERY = text("DELETE FROM chat_sessions WHERE id = :session_id RETURNING user_id::text")
+LAST_ACTIVE_SESSION_QUERY = text("""
+    SELECT id::text as session_id, title, created_at
+    FROM chat_sessions
+    WHERE user_id = :user_id
+    ORDER BY created_at DESC
+    LIMIT 1
+""")
+RECENT_MESSAGES_QUERY = text("SELECT role, message, created_at as timestamp FROM chat_messages WHERE session_id = :session_id ORDER BY created_at DESC LIMIT :limit")
+DOCS_FOR_ELABORATION_QUERY = text("SELECT id::text AS id, title, content, content_hash FROM documents ORDER BY type, title")
+UPDATE_DOCUMENT_QUERY = text("UPDATE documents SET content = :new_content, content_hash = :content_hash WHERE id = :doc_id")
+PR_DIFFS_FOR_USER_QUERY = text("""
+    SELECT gd.diff_text
+    FROM git_diffs gd
+    JOIN pull_requests pr ON gd.pr_id = pr.id
+    JOIN jira_tickets jt ON pr.ticket_id = jt.id
+    WHERE gd.pr_id = :pr_id AND jt.assigned_to = :user_id
+""")
+# Matches ticket titles/descriptions and PR titles/summaries, limited to tickets assigned to the user
+SEARCH_PRS_FOR_USER_QUERY = text("""
+    SELECT DISTINCT pr.id::text AS id, pr.title, pr.summary, pr.ticket_id::text AS ticket_id,
+           pr.author_id::text AS author_id, pr.project_id::text AS project_id,
+           jt.title as ticket_title, jt.description as ticket_description,
+           jt.status as ticket_status, p.name as project_name
+    FROM pull_requests pr
+    JOIN jira_tickets jt ON pr.ticket_id = jt.id
+    JOIN projects p ON pr.project_id = p.id
+    WHERE (
+        LOWER(jt.title) LIKE LOWER(:search_term) OR
+        LOWER(jt.description) LIKE LOWER(:search_term) OR
+        LOWER(pr.title) LIKE LOWER(:search_term) OR
+        LOWER(pr.summary) LIKE LOWER(:search_term)
+    )
+    AND jt.assigned_to = :user_id
+    ORDER BY pr.title
+""")
+
 def create_chat_session(user_id: str, title: str) -> str:
     """Creates a new chat session and returns the session ID."""
     db_session = get_db_session()
     try:
         result = db_session.execute(
-            text("INSERT INTO chat_sessions (user_id, title) VALUES (:user_id, :title) RETURNING id"),
+            CREATE_SESSION_QUERY,
             {"user_id": user_id, "title": title}
         ).fetchone()
         if not result:
             raise Exception("Failed to create a new session.")
-        session_id = str(result[0])
+        session_id = result[0]
         db_session.commit()
+        sessions_cache.delete(user_id)
         return session_id
     except Exception as e:
         db_session.rollback()
@@ -34,7 +133,7 @@ def store_message(session_id: str, user_id: str, role: Literal["user", "assistan
     db_session = get_db_session()
     try:
         db_session.execute(
-            text("INSERT INTO chat_messages (session_id, user_id, role, message) VALUES (:session_id, :user_id, :role, :message)"),
+            INSERT_MESSAGE_QUERY,
             {"session_id": session_id, "user_id": user_id, "role": role, "message": message}
         )
         db_session.commit()
@@ -45,301 +144,330 @@ def store_message(session_id: str, user_id: str, role: Literal["user", "assistan
     finally:
         db_session.close()
 
-def get_sessions(user_id: str) -> List[dict]:
+async def acreate_chat_session_with_message(session_id: str, user_id: str, title: str, message: str):
+    """
+    Creates a chat session with the given ID and stores the user's first message in it,
+    in a single statement (one round trip).
+    """
+    async with get_async_db_session() as db_session:
+        try:
+            await db_session.execute(
+                CREATE_SESSION_WITH_MESSAGE_QUERY,
+                {"session_id": session_id, "user_id": user_id, "title": title, "message": message}
+            )
+            await db_session.commit()
+            sessions_cache.delete(user_id)
+        except Exception as e:
+            await db_session.rollback()
+            logger.error(f"Error creating chat session: {e}", exc_info=True)
+            raise
+
+async def astore_message(session_id: str, user_id: str, role: Literal["user", "assistant"], message: str):
+    """Async version of `store_message`, for use in async request handlers."""
+    async with get_async_db_session() as db_session:
+        try:
+            await db_session.execute(
+                INSERT_MESSAGE_QUERY,
+                {"session_id": session_id, "user_id": user_id, "role": role, "message": message}
+            )
+            await db_session.commit()
+        except Exception as e:
+            await db_session.rollback()
+            logger.error(f"Error storing message: {e}", exc_info=True)
+            raise
+
+async def aget_sessions(user_id: str) -> List[dict]:
     """Retrieves all chat sessions for a user."""
-    db_session = get_db_session()
-    try:
-        results = db_session.execute(
-            text("SELECT id as session_id, title, created_at FROM chat_sessions WHERE user_id = :user_id ORDER BY created_at DESC"),
+    hit = sessions_cache.get(user_id)
+    if hit is not None:
+        return hit
+
+    async with get_async_engine().connect() as conn:
+        results = await conn.execute(
+            SESSIONS_BY_USER_QUERY,
             {"user_id": user_id}
-        ).fetchall()
-        return [
-            {"session_id": str(row.session_id), "title": row.title, "created_at": row.created_at}
-            for row in results
+        )
+        # Unpacking rows positionally skips Row attribute lookups
+        sessions = [
+            {"session_id": session_id, "title": title, "created_at": created_at}
+            for session_id, title, created_at in results
         ]
-    finally:
-        db_session.close()
+    sessions_cache.set(user_id, sessions)
+    return sessions
 
-def get_messages(session_id: str) -> List[dict]:
+async def aget_messages(session_id: str) -> List[dict]:
     """Retrieves all messages for a given session."""
-    db_session = get_db_session()
-    try:
-        results = db_session.execute(
-            text("SELECT role, message, created_at as timestamp FROM chat_messages WHERE session_id = :session_id ORDER BY created_at ASC"),
+    async with get_async_engine().connect() as conn:
+        results = await conn.execute(
+            MESSAGES_BY_SESSION_QUERY,
             {"session_id": session_id}
-        ).fetchall()
-        return [dict(row._mapping) for row in results]
-    finally:
-        db_session.close()
+        )
+        return [dict(message) for message in results.mappings()]
 
-def get_history(session_id: str) -> List[AnyMessage]:
+async def aget_history(session_id: str) -> List[AnyMessage]:
     """Retrieves the message history for a session and formats it for the agent."""
-    messages = get_messages(session_id)
+    messages = await aget_messages(session_id)
     history: List[AnyMessage] = [
         HumanMessage(content=m['message']) if m['role'] == 'user' else AIMessage(content=m['message'])
         for m in messages
     ]
     return history
 
-def get_user_by_email_for_auth(email: str) -> Optional[dict]:
-    """Retrieves user details for authentication by email."""
-    db_session = get_db_session()
-    try:
-        query = text("SELECT id, name, email, password, role FROM users WHERE email = :email")
-        result = db_session.execute(query, {"email": email}).fetchone()
-        if not result:
-            return None
-        
-        user_data = dict(result._mapping)
-        user_data['id'] = str(user_data['id'])
-        return user_data
-    finally:
-        db_session.close()
+@cached(user_by_email_cache)
+async def aget_user_by_email_for_auth(email: str) -> Optional[dict]:
+    """Retrieves the columns needed to authenticate a user by email, including the password hash."""
+    pool = await get_asyncpg_pool()
+    result = await pool.fetchrow(LOGIN_USER_QUERY, email)
+    return dict(result) if result else None
 
-def get_all_users() -> List[dict]:
-    """Retrieves all users."""
-    db_session = get_db_session()
-    try:
-        query = text("SELECT id, name, email, role FROM users ORDER BY name")
-        result = db_session.execute(query).fetchall()
-        users = []
-        for row in result:
-            user_data = dict(row._mapping)
-            user_data['id'] = str(user_data['id'])
-            users.append(user_data)
-        return users
-    finally:
-        db_session.close()
+async def aget_all_users(limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+    """Retrieves all users, with optional pagination."""
+    query = "SELECT id::text AS id, name, email, role FROM users ORDER BY name, users.id"
+    params: dict = {"offset": offset}
+    if limit is not None:
+        query += " LIMIT :limit"
+        params["limit"] = limit
+    query += " OFFSET :offset"
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(text(query), params)
+        return [dict(row) for row in result.mappings()]
 
-def get_tickets_by_user(user_id: Optional[str] = None, status: Optional[str] = None, ticket_id: Optional[str] = None) -> List[dict]:
+@cached(tickets_cache)
+async def aget_tickets_by_user(user_id: Optional[str] = None, status: Optional[str] = None, ticket_id: Optional[str] = None) -> List[dict]:
     """Get tickets, filtering by user, status, or ticket ID."""
-    db_session = get_db_session()
-    try:
-        base_query = """
-            SELECT jt.id, jt.title, jt.description, jt.status, 
-                   jt.project_id, jt.assigned_to, p.name as project_name
-            FROM jira_tickets jt 
-            JOIN projects p ON jt.project_id = p.id
-        """
-        conditions = []
-        params = {}
-        
-        if user_id:
-            conditions.append("jt.assigned_to = :user_id")
-            params["user_id"] = user_id
-        if status:
-            conditions.append("LOWER(jt.status) = :status")
-            params["status"] = status
-        if ticket_id:
-            conditions.append("jt.id = :ticket_id")
-            params["ticket_id"] = ticket_id
-
-        if conditions:
-            base_query += " WHERE " + " AND ".join(conditions)
-        
-        base_query += " ORDER BY jt.status, jt.title"
-        query = text(base_query)
-        
-        result = db_session.execute(query, params).fetchall()
-        tickets = []
-        for row in result:
-            ticket = dict(row._mapping)
-            ticket['id'] = str(ticket['id'])
-            ticket['project_id'] = str(ticket['project_id'])
-            ticket['assigned_to'] = str(ticket['assigned_to'])
-            tickets.append(ticket)
-        return tickets
-    finally:
-        db_session.close()
+    base_query = """
+        SELECT jt.id::text AS id, jt.title, jt.description, jt.status,
+               jt.project_id::text AS project_id, jt.assigned_to::text AS assigned_to, p.name as project_name
+        FROM jira_tickets jt
+        JOIN projects p ON jt.project_id = p.id
+    """
+    conditions = []
+    params = {}
+    
+    if user_id:
+        conditions.append("jt.assigned_to = :user_id")
+        params["user_id"] = user_id
+    if status:
+        conditions.append("LOWER(jt.status) = :status")
+        params["status"] = status
+    if ticket_id:
+        conditions.append("jt.id = :ticket_id")
+        params["ticket_id"] = ticket_id
+
+    if conditions:
+        base_query += " WHERE " + " AND ".join(conditions)
+    
+    base_query += " ORDER BY jt.status, jt.title"
+    query = text(base_query)
+    
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(query, params)
+        return [dict(row) for row in result.mappings()]
+
+async def aget_ticket_with_prs(ticket_id: str) -> Optional[dict]:
+    """Get a ticket together with its pull requests in a single query."""
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(TICKET_WITH_PRS_QUERY, {"ticket_id": ticket_id})).mappings().all()
+    if not result:
+        return None
 
-def get_pull_requests_by_ticket(ticket_id: str) -> List[dict]:
+    first = result[0]
+    ticket = {
+        "id": first["id"],
+        "title": first["title"],
+        "description": first["description"],
+        "status": first["status"],
+        "project_id": first["project_id"],
+        "assigned_to": first["assigned_to"],
+        "project_name": first["project_name"],
+    }
+    # A ticket without pull requests comes back as a single row with NULL PR columns
+    pull_requests = [
+        {
+            "id": row["pr_id"],
+            "title": row["pr_title"],
+            "summary": row["pr_summary"],
+            "ticket_id": ticket["id"],
+            "author_id": row["pr_author_id"],
+            "project_id": row["pr_project_id"],
+        }
+        for row in result
+        if row["pr_id"] is not None
+    ]
+    return {"ticket": ticket, "pull_requests": pull_requests}
+
+async def aget_pull_requests_by_ticket(ticket_id: str) -> List[dict]:
     """Get all pull requests for a specific ticket."""
-    db_session = get_db_session()
-    try:
-        query = text("""
-            SELECT id, title, summary, ticket_id, author_id, project_id
-            FROM pull_requests
-            WHERE ticket_id = :ticket_id
-            ORDER BY title
-        """)
-        result = db_session.execute(query, {"ticket_id": ticket_id}).fetchall()
-        prs = []
-        for row in result:
-            pr = dict(row._mapping)
-            pr['id'] = str(pr['id'])
-            pr['ticket_id'] = str(pr['ticket_id'])
-            pr['author_id'] = str(pr['author_id'])
-            pr['project_id'] = str(pr['project_id'])
-            prs.append(pr)
-        return prs
-    finally:
-        db_session.close()
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(PRS_BY_TICKET_QUERY, {"ticket_id": ticket_id})
+        return [dict(row) for row in result.mappings()]
 
-def get_diff_by_pr(pr_id: str) -> Optional[dict]:
+@cached(diffs_cache)
+async def aget_diff_by_pr(pr_id: str) -> Optional[dict]:
     """Get the git diff for a specific pull request."""
-    db_session = get_db_session()
-    try:
-        query = text("SELECT id, diff_text, pr_id FROM git_diffs WHERE pr_id = :pr_id")
-        result = db_session.execute(query, {"pr_id": pr_id}).fetchone()
-        if not result:
-            return None
-        diff = dict(result._mapping)
-        diff['id'] = str(diff['id'])
-        diff['pr_id'] = str(diff['pr_id'])
-        return diff
-    finally:
-        db_session.close()
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(DIFF_BY_PR_QUERY, {"pr_id": pr_id})).fetchone()
+    if not result:
+        return None
+    return dict(result._mapping)
 
-def get_docs(doc_id: Optional[str] = None, project_id: Optional[str] = None) -> List[dict]:
-    """Get documents, optionally filtering by doc ID or project ID."""
-    db_session = get_db_session()
-    try:
-        base_query = """
-            SELECT d.id, d.title, d.content, d.type, 
-                   d.project_id, p.name as project_name
-            FROM documents d
-            JOIN projects p ON d.project_id = p.id
-        """
-        params = {}
-        if doc_id:
-            base_query += " WHERE d.id = :doc_id"
-            params["doc_id"] = doc_id
-        elif project_id:
-            base_query += " WHERE d.project_id = :project_id"
-            params["project_id"] = project_id
-        
-        base_query += " ORDER BY d.type, d.title"
-        query = text(base_query)
-        
-        result = db_session.execute(query, params).fetchall()
-        docs = []
-        for row in result:
-            doc = dict(row._mapping)
-            doc['id'] = str(doc['id'])
-            doc['project_id'] = str(doc['project_id'])
-            docs.append(doc)
-        return docs
-    finally:
-        db_session.close()
+def _docs_query(doc_id: Optional[str], project_id: Optional[str], limit: Optional[int], offset: int):
+    """Builds the documents query and its parameters for `aget_docs`."""
+    base_query = """
+        SELECT d.id::text AS id, d.title, d.content, d.type,
+               d.project_id::text AS project_id, p.name as project_name
+        FROM documents d
+        JOIN projects p ON d.project_id = p.id
+    """
+    params = {}
+    if doc_id:
+        base_query += " WHERE d.id = :doc_id"
+        params["doc_id"] = doc_id
+    elif project_id:
+        base_query += " WHERE d.project_id = :project_id"
+        params["project_id"] = project_id
+    
+    base_query += " ORDER BY d.type, d.title, d.id"
+    if limit is not None:
+        base_query += " LIMIT :limit"
+        params["limit"] = limit
+    base_query += " OFFSET :offset"
+    params["offset"] = offset
+    return text(base_query), params
 
-def get_learnings(learning_id: Optional[str] = None, tag: Optional[str] = None, q: Optional[str] = None) -> List[dict]:
-    """Get learning resources, with optional filtering."""
-    db_session = get_db_session()
-    try:
-        base_query = "SELECT id, title, summary, tags, urls FROM learnings"
-        params = {}
-        if learning_id:
-            base_query += " WHERE id = :learning_id"
-            params["learning_id"] = learning_id
-        elif tag:
-            base_query += " WHERE :tag ILIKE ANY(tags)"
-            params["tag"] = tag
-        elif q:
-            base_query += " WHERE LOWER(title) LIKE LOWER(:search_term) OR LOWER(summary) LIKE LOWER(:search_term)"
-            params["search_term"] = f"%{q}%"
-            
-        base_query += " ORDER BY title"
-        query = text(base_query)
+@cached(docs_cache)
+async def aget_docs(
+    doc_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[dict]:
+    """Get documents, optionally filtering by doc ID or project ID, with optional pagination."""
+    query, params = _docs_query(doc_id, project_id, limit, offset)
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(query, params)
+        return [dict(row) for row in result.mappings()]
+
+def _learnings_query(
+    learning_id: Optional[str], tag: Optional[str], q: Optional[str], limit: Optional[int], offset: int
+):
+    """Builds the learnings query and its parameters for `aget_learnings`."""
+    base_query = "SELECT id::text AS id, title, summary, tags, urls FROM learnings"
+    params = {}
+    if learning_id:
+        base_query += " WHERE id = :learning_id"
+        params["learning_id"] = learning_id
+    elif tag:
+        base_query += " WHERE :tag ILIKE ANY(tags)"
+        params["tag"] = tag
+    elif q:
+        base_query += " WHERE title ILIKE :search_term OR summary ILIKE :search_term"
+        params["search_term"] = f"%{q}%"
         
-        result = db_session.execute(query, params).fetchall()
-        learnings = []
-        for row in result:
-            learning = dict(row._mapping)
-            learning['id'] = str(learning['id'])
-            learnings.append(learning)
-        return learnings
-    finally:
-        db_session.close()
+    base_query += " ORDER BY title, learnings.id"
+    if limit is not None:
+        base_query += " LIMIT :limit"
+        params["limit"] = limit
+    base_query += " OFFSET :offset"
+    params["offset"] = offset
+    return text(base_query), params
+
+# Free-text searches are not cached, since every distinct term would get its own entry
+@cached(learnings_cache, unless=lambda args: bool(args["q"]))
+async def aget_learnings(
+    learning_id: Optional[str] = None,
+    tag: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[dict]:
+    """Get learning resources, with optional filtering and pagination."""
+    query, params = _learnings_query(learning_id, tag, q, limit, offset)
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(query, params)
+        return [dict(row) for row in result.mappings()]
 
-def get_user_by_id(user_id: str) -> Optional[dict]:
+@cached(user_by_id_cache)
+async def aget_user_by_id(user_id: str) -> Optional[dict]:
     """Get information about a specific user by ID."""
-    db_session = get_db_session()
-    try:
-        query = text("SELECT id, name, email, role FROM users WHERE id = :user_id")
-        result = db_session.execute(query, {"user_id": user_id}).fetchone()
-        if not result:
-            return None
-        user = dict(result._mapping)
-        user['id'] = str(user['id'])
-        return user
-    finally:
-        db_session.close()
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(USER_BY_ID_QUERY, {"user_id": user_id})).fetchone()
+    if not result:
+        return None
+    return dict(result._mapping)
 
-def rename_chat_session(session_id: str, new_title: str) -> bool:
+async def arename_chat_session(session_id: str, new_title: str) -> bool:
     """Renames a chat session."""
-    db_session = get_db_session()
     try:
-        query = text("UPDATE chat_sessions SET title = :new_title WHERE id = :session_id")
-        result = db_session.execute(query, {"new_title": new_title, "session_id": session_id})
-        db_session.commit()
-        return result.rowcount > 0  # type: ignore
+        # `begin()` commits on success and rolls back if the block raises
+        async with get_async_engine().begin() as conn:
+            result = (await conn.execute(RENAME_SESSION_QUERY, {"new_title": new_title, "session_id": session_id})).fetchone()
     except Exception as e:
-        db_session.rollback()
         logger.error(f"Error renaming session {session_id}: {e}", exc_info=True)
         raise
-    finally:
-        db_session.close()
+    if not result:
+        return False
+    sessions_cache.delete(result.user_id)
+    return True
 
-def delete_chat_session(session_id: str) -> bool:
+async def adelete_chat_session(session_id: str) -> bool:
     """Deletes a chat session and all its messages."""
-    db_session = get_db_session()
     try:
-        # First, delete associated messages to maintain foreign key integrity
-        db_session.execute(text("DELETE FROM chat_messages WHERE session_id = :session_id"), {"session_id": session_id})
+        async with get_async_engine().begin() as conn:
+            # First, delete associated messages to maintain foreign key integrity
+            await conn.execute(DELETE_SESSION_MESSAGES_QUERY, {"session_id": session_id})
 
-        # Then, delete the session itself
-        result = db_session.execute(text("DELETE FROM chat_sessions WHERE id = :session_id"), {"session_id": session_id})
-        
-        db_session.commit()
-        
-        return result.rowcount > 0  # type: ignore
+            # Then, delete the session itself
+            result = (await conn.execute(
+                DELETE_SESSION_QUERY, {"session_id": session_id}
+            )).fetchone()
     except Exception as e:
-        db_session.rollback()
         logger.error(f"Error deleting session {session_id}: {e}", exc_info=True)
         raise
-    finally:
-        db_session.close()
+    if not result:
+        return False
+    sessions_cache.delete(result.user_id)
+    return True
 
-def get_last_active_session(user_id: str) -> Optional[dict]:
+async def aget_last_active_session(user_id: str) -> Optional[dict]:
     """Get the most recently created session for a user."""
-    db_session = get_db_session()
-    try:
-        query = text("""
-            SELECT id as session_id, title, created_at 
-            FROM chat_sessions 
-            WHERE user_id = :user_id 
-            ORDER BY created_at DESC 
-            LIMIT 1
-        """)
-        result = db_session.execute(query, {"user_id": user_id}).fetchone()
-        if not result:
-            return None
-        
-        session = dict(result._mapping)
-        session['session_id'] = str(session['session_id'])
-        return session
-    finally:
-        db_session.close()
+    async with get_async_engine().connect() as conn:
+        result = (await conn.execute(LAST_ACTIVE_SESSION_QUERY, {"user_id": user_id})).fetchone()
+    if not result:
+        return None
+    
+    return dict(result._mapping)
 
 def get_recent_messages(session_id: str, limit: int = 10) -> List[dict]:
     """Retrieves the most recent messages for a given session, ordered by timestamp DESC."""
     db_session = get_db_session()
     try:
         results = db_session.execute(
-            text("SELECT role, message, created_at as timestamp FROM chat_messages WHERE session_id = :session_id ORDER BY created_at DESC LIMIT :limit"),
+            RECENT_MESSAGES_QUERY,
             {"session_id": session_id, "limit": limit}
-        ).fetchall()
-        return [dict(row._mapping) for row in results]
+        )
+        return [dict(message) for message in results.mappings()]
+    finally:
+        db_session.close()
+
+def get_docs_for_elaboration() -> List[dict]:
+    """Get the id, title, content and last elaborated content hash of every document."""
+    db_session = get_db_session()
+    try:
+        result = db_session.execute(DOCS_FOR_ELABORATION_QUERY)
+        return [dict(row) for row in result.mappings()]
     finally:
         db_session.close()
 
-def update_document_content(doc_id: str, new_content: str) -> bool:
-    """Updates the content of a specific document."""
+def update_document_content(doc_id: str, new_content: str, content_hash: Optional[str] = None) -> bool:
+    """Updates the content of a specific document, along with the hash of the new content."""
     db_session = get_db_session()
     try:
-        query = text("UPDATE documents SET content = :new_content WHERE id = :doc_id")
-        result = db_session.execute(query, {"new_content": new_content, "doc_id": doc_id})
+        result = db_session.execute(
+            UPDATE_DOCUMENT_QUERY, {"new_content": new_content, "content_hash": content_hash, "doc_id": doc_id}
+        )
         db_session.commit()
+        docs_cache.clear()
         return result.rowcount > 0  # type: ignore
     except Exception as e:
         db_session.rollback()
@@ -348,62 +476,16 @@ def update_document_content(doc_id: str, new_content: str) -> bool:
     finally:
         db_session.close()
 
-def search_pull_requests_by_query(query: str, user_id: str) -> List[dict]:
+async def asearch_pull_requests_by_query(query: str, user_id: str) -> List[dict]:
     """Search for pull requests based on query terms matching ticket titles/descriptions or PR titles/summaries."""
-    db_session = get_db_session()
-    try:
-        base_query = """
-            SELECT DISTINCT pr.id, pr.title, pr.summary, pr.ticket_id, pr.author_id, pr.project_id,
-                   jt.title as ticket_title, jt.description as ticket_description, 
-                   jt.status as ticket_status, p.name as project_name
-            FROM pull_requests pr
-            JOIN jira_tickets jt ON pr.ticket_id = jt.id
-            JOIN projects p ON pr.project_id = p.id
-            WHERE (
-                LOWER(jt.title) LIKE LOWER(:search_term) OR 
-                LOWER(jt.description) LIKE LOWER(:search_term) OR
-                LOWER(pr.title) LIKE LOWER(:search_term) OR
-                LOWER(pr.summary) LIKE LOWER(:search_term)
-            )
-        """
-        
-        params = {"search_term": f"%{query}%", "user_id": user_id}
-        
-        # Filter by tickets assigned to the user
-        base_query += " AND jt.assigned_to = :user_id"
-        base_query += " ORDER BY pr.title"
-        
-        sql_query = text(base_query)
-        result = db_session.execute(sql_query, params).fetchall()
-        
-        prs = []
-        for row in result:
-            pr = dict(row._mapping)
-            pr['id'] = str(pr['id'])
-            pr['ticket_id'] = str(pr['ticket_id'])
-            pr['author_id'] = str(pr['author_id'])
-            pr['project_id'] = str(pr['project_id'])
-            prs.append(pr)
-        return prs
-    finally:
-        db_session.close()
+    params = {"search_term": f"%{query}%", "user_id": user_id}
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(SEARCH_PRS_FOR_USER_QUERY, params)
+        return [dict(row) for row in result.mappings()]
 
-def get_git_diffs_by_pr_id(pr_id: str, user_id: str) -> List[str]:
+async def aget_git_diffs_by_pr_id(pr_id: str, user_id: str) -> List[str]:
     """Get all git diff texts for a specific pull request ID with user access control."""
-    db_session = get_db_session()
-    try:
-        # Check if user has access to this PR by verifying the associated ticket is assigned to them
-        access_check_stmt = text("""
-            SELECT gd.diff_text 
-            FROM git_diffs gd
-            JOIN pull_requests pr ON gd.pr_id = pr.id
-            JOIN jira_tickets jt ON pr.ticket_id = jt.id
-            WHERE gd.pr_id = :pr_id AND jt.assigned_to = :user_id
-        """)
-        results = db_session.execute(access_check_stmt, {"pr_id": pr_id, "user_id": user_id}).fetchall()
-        return [row[0] for row in results] if results else []
-    except Exception as e:
-        logger.error(f"Error getting git diffs for PR {pr_id} and user {user_id}: {e}", exc_info=True)
-        raise
-    finally:
-        db_session.close() 
\ No newline at end of file
+    # Access is checked in the same query: the PR's ticket must be assigned to the user
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(PR_DIFFS_FOR_USER_QUERY, {"pr_id": pr_id, "user_id": user_id})
+        return list(result.scalars())
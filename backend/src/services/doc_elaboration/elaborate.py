@@ -0,0 +1,264 @@
+import os
+import asyncio
+from dotenv import load_dotenv
+from langchain_community.cache import SQLiteCache
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.output_parsers import JsonOutputParser
+from pydantic import SecretStr
+
+from src.utils.hashing import content_hash
+from src.utils.llm_retry import retry_transient_llm_errors
+from src.utils.logger import get_logger
+from src.services.database_manager import operations as db_ops
+
+# --- Setup ---
+load_dotenv("configs/.env")
+load_dotenv("configs/secrets/.env")
+
+logger = get_logger(__name__)
+
+# Persistent LLM response cache: re-runs over unchanged documents skip the API call,
+# since cache entries are keyed on the full prompt (titles and contents) and model params.
+# It is attached to the elaboration model only, never set globally: this job also runs
+# inside the API server, whose other models must not read from or write to it.
+LLM_CACHE_PATH = ".langchain_cache.db"
+
+# Upper bound for a single elaboration request, including the streamed response.
+LLM_REQUEST_TIMEOUT = 120
+
+# Maximum number of batches elaborated concurrently against the OpenAI API.
+CONCURRENCY = 8
+
+# Maximum number of documents packed into a single elaboration prompt.
+BATCH_SIZE = 4
+
+# Approximate prompt budget per batch; quality degrades on longer packed prompts.
+MAX_BATCH_PROMPT_TOKENS = 6000
+
+SYSTEM_PROMPT = (
+    "You are an expert technical documentation writer. Given the title and existing content "
+    "of a project's documentation, elaborate and rewrite it into a more complete, clear, and "
+    "detailed Markdown guide suitable for developers. Preserve the original intent but expand "
+    "on it with examples, better structure, and clear explanations. Ensure the final output "
+    "is pure, well-formatted markdown. Ensure not to use any code blocks in the output."
+)
+
+BATCH_INSTRUCTIONS = (
+    "You will receive a numbered list of documents. Elaborate each document independently. "
+    "Return only a JSON list with one object per document, in the form "
+    '[{"id": 1, "output": "<elaborated markdown>"}, ...], where "id" is the number of the document.'
+)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Roughly estimates the token count of a text (about 4 characters per token)."""
+    return len(text) // 4
+
+
+def _batch_documents(documents: list[dict], batch_size: int = BATCH_SIZE) -> list[list[dict]]:
+    """Groups documents into batches bounded by both size and approximate prompt tokens."""
+    batches: list[list[dict]] = []
+    current: list[dict] = []
+    current_tokens = _estimate_tokens(SYSTEM_PROMPT + BATCH_INSTRUCTIONS)
+
+    for doc in documents:
+        doc_tokens = _estimate_tokens(doc['title'] + doc['content'])
+        if current and (len(current) >= batch_size or current_tokens + doc_tokens > MAX_BATCH_PROMPT_TOKENS):
+            batches.append(current)
+            current = []
+            current_tokens = _estimate_tokens(SYSTEM_PROMPT + BATCH_INSTRUCTIONS)
+        current.append(doc)
+        current_tokens += doc_tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def get_llm() -> ChatOpenAI:
+    """
+    Returns a new chat model for one elaboration run. The model's async HTTP client is bound
+    to the event loop it first runs on, and the admin API runs each job on a fresh loop, so
+    a model must not outlive its run.
+
+    With `streaming=True` the completion is streamed from the provider and
+    aggregated by `ainvoke`, which still goes through the model's LLM cache.
+    """
+    return ChatOpenAI(
+        api_key=SecretStr(os.environ["OPENAI_API_KEY"]),
+        cache=SQLiteCache(database_path=LLM_CACHE_PATH),
+        model="gpt-4o-mini",
+        temperature=0.4,
+        streaming=True,
+        timeout=LLM_REQUEST_TIMEOUT,
+        # Retries are handled by _invoke_llm, with backoff shared across concurrent batches
+        max_retries=0,
+    )
+
+
+@retry_transient_llm_errors(logger)
+async def _invoke_llm(llm: ChatOpenAI, messages: list) -> str:
+    """Calls the LLM, retrying rate limits and other transient API errors."""
+    response = await llm.ainvoke(messages)
+    return str(response.content)
+
+
+# --- LLM Elaborator ---
+class DocElaborator:
+    """A service to elaborate on documentation content using an LLM."""
+    def __init__(self):
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            logger.error("OPENAI_API_KEY is not set in the environment variables.")
+            raise ValueError("OPENAI_API_KEY must be set to elaborate documents.")
+
+        self.llm = get_llm()
+        self.output_parser = JsonOutputParser()
+        logger.info("DocElaborator initialized.")
+
+    async def elaborate_markdown(self, title: str, content: str) -> str:
+        """Uses an LLM to elaborate on markdown content."""
+        logger.info(f"Elaborating content for document: '{title}'")
+
+        human_prompt = f"Please elaborate on the following documentation:\n\nTitle: {title}\n\nContent:\n{content}"
+
+        messages = [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=human_prompt),
+        ]
+
+        try:
+            elaborated_content = await _invoke_llm(self.llm, messages)
+            logger.info(f"Successfully elaborated content for '{title}'.")
+            return elaborated_content
+        except Exception as e:
+            logger.error(f"Failed to elaborate content for '{title}': {e}", exc_info=True)
+            raise
+
+    async def elaborate_batch(self, docs: list[dict]) -> list[str]:
+        """
+        Elaborates several documents with a single LLM call.
+
+        The shared system prompt is sent once and the documents are appended as a
+        numbered list. The model returns a JSON list of `{"id", "output"}` objects,
+        which is mapped back to the input order by id.
+        """
+        if len(docs) == 1:
+            return [await self.elaborate_markdown(docs[0]['title'], docs[0]['content'])]
+
+        titles = [doc['title'] for doc in docs]
+        logger.info(f"Elaborating a batch of {len(docs)} documents: {titles}")
+
+        numbered_docs = "\n\n".join(
+            f"{i}. Title: {doc['title']}\nContent:\n{doc['content']}"
+            for i, doc in enumerate(docs, start=1)
+        )
+        messages = [
+            SystemMessage(content=f"{SYSTEM_PROMPT}\n\n{BATCH_INSTRUCTIONS}"),
+            HumanMessage(content=f"Please elaborate on the following documentation:\n\n{numbered_docs}"),
+        ]
+
+        try:
+            response_content = await _invoke_llm(self.llm, messages)
+            parsed = self.output_parser.parse(response_content)
+            outputs = {int(item["id"]): str(item["output"]) for item in parsed}
+
+            missing = [i for i in range(1, len(docs) + 1) if i not in outputs]
+            if missing:
+                raise ValueError(f"LLM response is missing documents with ids {missing}")
+
+            logger.info(f"Successfully elaborated batch of {len(docs)} documents.")
+            return [outputs[i] for i in range(1, len(docs) + 1)]
+        except Exception as e:
+            logger.error(f"Failed to elaborate batch {titles}: {e}", exc_info=True)
+            raise
+
+
+def _dedupe_documents(documents: list[dict]) -> list[dict]:
+    """
+    Drops documents whose content is unchanged since the last elaboration and
+    collapses documents with identical titles and content into one entry.
+
+    Each returned document carries the ids of all its identical copies in `ids`,
+    so one elaboration is written back to every copy.
+    """
+    unique: dict[str, dict] = {}
+    for doc in documents:
+        if doc['content_hash'] == content_hash(doc['content']):
+            continue
+        key = content_hash(f"{doc['title']}\n{doc['content']}")
+        if key in unique:
+            unique[key]['ids'].append(doc['id'])
+        else:
+            unique[key] = {**doc, 'ids': [doc['id']]}
+    return list(unique.values())
+
+
+async def _process_batch(elaborator: DocElaborator, docs: list[dict], semaphore: asyncio.Semaphore) -> int:
+    """Elaborates a batch of documents and writes the results back to the database."""
+    try:
+        async with semaphore:
+            new_contents = await elaborator.elaborate_batch(docs)
+    except Exception as e:
+        logger.error(f"Skipping batch of {len(docs)} documents due to an error: {e}")
+        return 0
+
+    updated_count = 0
+    for doc, new_content in zip(docs, new_contents):
+        title = doc['title']
+        new_hash = content_hash(new_content)
+        for doc_id in doc['ids']:
+            try:
+                success = await asyncio.to_thread(db_ops.update_document_content, doc_id, new_content, new_hash)
+
+                if success:
+                    logger.info(f"Successfully updated document: '{title}' (ID: {doc_id})")
+                    updated_count += 1
+                else:
+                    logger.warning(f"Update for document '{title}' (ID: {doc_id}) failed.")
+
+            except Exception as e:
+                logger.error(f"Skipping document '{title}' (ID: {doc_id}) due to an error: {e}")
+                continue
+
+    return updated_count
+
+
+async def run_elaboration(concurrency: int = CONCURRENCY):
+    """
+    Fetches all documents, elaborates their content using an LLM,
+    and updates them in the database.
+
+    Documents already elaborated and unchanged since are skipped, and identical
+    documents are elaborated once. The remaining documents are packed into
+    batches that share one prompt, and at most `concurrency` batches are in
+    flight at any time.
+    """
+    logger.info("Starting documentation elaboration process...")
+
+    try:
+        elaborator = DocElaborator()
+        documents = await asyncio.to_thread(db_ops.get_docs_for_elaboration)
+    except Exception as e:
+        logger.error(f"Failed to initialize or fetch documents: {e}", exc_info=True)
+        return
+
+    pending = _dedupe_documents(documents)
+    if not pending:
+        logger.info("No new or changed documents found to elaborate.")
+        return
+
+    batches = _batch_documents(pending)
+    logger.info(
+        f"Found {len(documents)} documents, {len(pending)} unique new or changed ones "
+        f"to process in {len(batches)} batches."
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.create_task(_process_batch(elaborator, batch, semaphore)) for batch in batches]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    updated_count = sum(result for result in results if isinstance(result, int))
+
+    logger.info(f"Documentation elaboration process finished. Updated {updated_count} documents.")
+
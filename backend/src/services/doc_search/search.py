@@ -1,3 +1,4 @@
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -105,4 +106,18 @@ class VectorSearchService:
             return result.get("result", "No specific learning resources found for that query.")
         except Exception as e:
             logger.error(f"An error occurred during learning search: {e}", extra=log_extra, exc_info=True)
-            return "Error: An unexpected error occurred while searching learning resources." 
\ No newline at end of file
+            return "Error: An unexpected error occurred while searching learning resources."
+
+    async def asearch_documentation(self, query: str, session_id: str = "anonymous") -> str:
+        """
+        Async variant of `search_documentation`. The vector store uses a sync connection,
+        so the search runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.search_documentation, query, session_id)
+
+    async def asearch_learnings(self, query: str, session_id: str = "anonymous") -> str:
+        """
+        Async variant of `search_learnings`. The vector store uses a sync connection,
+        so the search runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.search_learnings, query, session_id)
@@ -0,0 +1,36 @@
+import httpx
+from langchain_openai import OpenAIEmbeddings
+
+# --- Shared Embedding Configuration ---
+
+# Embedding model configuration
+EMBEDDING_MODEL = "text-embedding-3-large"
+
+# Vector store configuration
+COLLECTION_NAME = "developer_docs"
+
+# Number of texts sent per embeddings request, and retries for transient API errors
+EMBEDDING_BATCH_SIZE = 512
+EMBEDDING_MAX_RETRIES = 6
+
+# Number of documents inserted into the vector store per batch
+INSERT_BATCH_SIZE = 500
+
+# Connection pool for the OpenAI API, shared by every embeddings request of a run
+HTTP_TIMEOUT_SECONDS = 60
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+
+
+def create_http_async_client() -> httpx.AsyncClient:
+    """Creates an async HTTP client whose keep-alive connections are reused across requests."""
+    return httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS, limits=HTTP_LIMITS)
+
+
+def get_embeddings(http_async_client: httpx.AsyncClient) -> OpenAIEmbeddings:
+    """Returns the batched embedding model, sending its async requests through the given client."""
+    return OpenAIEmbeddings(
+        model=EMBEDDING_MODEL,
+        chunk_size=EMBEDDING_BATCH_SIZE,
+        max_retries=EMBEDDING_MAX_RETRIES,
+        http_async_client=http_async_client,
+    )
@@ -0,0 +1,211 @@
+import os
+import asyncio
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from sqlalchemy import create_engine, text
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+from langchain.text_splitter import Language, RecursiveCharacterTextSplitter
+
+from src.services.database_manager.connection import get_db_connection_string
+from src.services.embedding_engine.config import (
+    COLLECTION_NAME,
+    INSERT_BATCH_SIZE,
+    create_http_async_client,
+    get_embeddings,
+)
+from src.utils.hashing import content_hash
+from src.utils.logger import get_logger
+
+# --- Setup ---
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+SESSION_ID = "doc-embed"
+log_extra = {"session_id": SESSION_ID}
+
+# --- General Configuration ---
+
+# Path to the documentation files
+DOCS_PATH = Path("data/docs")
+
+# Text splitter configuration
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 200
+
+# Split across worker processes only when there are enough documents to outweigh the start-up cost
+PARALLEL_SPLIT_THRESHOLD = 200
+
+
+async def _read_file(path: Path) -> str:
+    """Reads a text file without blocking the event loop."""
+    return await asyncio.to_thread(path.read_text, encoding="utf-8")
+
+
+def _split_documents(docs: list[Document], parallel: bool = False) -> list[Document]:
+    """
+    Splits documents into markdown-aware chunks. With `parallel`, large corpora are split in
+    worker processes; only the CLI does that, since forking a process pool from a threadpool
+    thread inside the API server is unsafe.
+    """
+    text_splitter = RecursiveCharacterTextSplitter.from_language(
+        Language.MARKDOWN, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+    )
+    if not parallel or len(docs) < PARALLEL_SPLIT_THRESHOLD:
+        return text_splitter.split_documents(docs)
+
+    num_workers = os.cpu_count() or 1
+    slice_size = -(-len(docs) // num_workers)  # ceiling division
+    doc_slices = [docs[i:i + slice_size] for i in range(0, len(docs), slice_size)]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        split_lists = executor.map(text_splitter.split_documents, doc_slices)
+    return [chunk for chunks in split_lists for chunk in chunks]
+
+
+def _get_embedded_files() -> dict[str, tuple[str, list[str]]]:
+    """
+    Returns the documentation files already in the collection, mapped to their
+    stored content hash and the ids of their chunks.
+    """
+    query = text("""
+        SELECT e.id, e.cmetadata->>'file_name' AS file_name, e.cmetadata->>'content_hash' AS content_hash
+        FROM langchain_pg_embedding e
+        JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+        WHERE c.name = :collection_name AND e.cmetadata->>'source' = 'documentation'
+    """)
+    engine = create_engine(get_db_connection_string())
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(query, {"collection_name": COLLECTION_NAME}).fetchall()
+    except Exception as e:
+        # The collection tables don't exist before the first run.
+        logger.warning(f"Could not read existing embeddings, embedding all files: {e}", extra=log_extra)
+        return {}
+    finally:
+        engine.dispose()
+
+    embedded: dict[str, tuple[str, list[str]]] = {}
+    for row in rows:
+        _, ids = embedded.setdefault(row.file_name, (row.content_hash, []))
+        ids.append(str(row.id))
+    return embedded
+
+
+async def embed_documents(full_rebuild: bool = False, parallel_split: bool = False) -> int:
+    """
+    Reads markdown files, splits them into chunks, generates embeddings,
+    and stores them in a PostgreSQL vector store. Returns the number of files embedded.
+
+    By default only new or changed files (by content hash) are embedded, and the
+    chunks of changed or deleted files are replaced. With `full_rebuild` the whole
+    collection is dropped and re-created. `parallel_split` splits large corpora in
+    worker processes, see `_split_documents`.
+    """
+    logger.info("Starting document embedding process.", extra=log_extra)
+
+    # 1. Read and prepare documents
+    all_docs = []
+    # Recursively find all markdown files
+    doc_files = list(DOCS_PATH.rglob("*.md"))
+    
+    if not doc_files:
+        logger.warning(f"No markdown files found in {DOCS_PATH}. Exiting.", extra=log_extra)
+        return 0
+
+    # Read all files concurrently; each blocking read runs in a worker thread
+    results = await asyncio.gather(
+        *(_read_file(doc_path) for doc_path in doc_files), return_exceptions=True
+    )
+    for doc_path, result in zip(doc_files, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Failed to read or process {doc_path.name}: {result}", extra=log_extra)
+            continue
+        # Use relative path for file_name and add source
+        relative_path = str(doc_path.relative_to(DOCS_PATH))
+        doc = Document(
+            page_content=result,
+            metadata={
+                "file_name": relative_path,
+                "source": "documentation",
+                "content_hash": content_hash(result),
+            },
+        )
+        all_docs.append(doc)
+
+    # Skip files whose content is unchanged since the last run
+    stale_ids: list[str] = []
+    if not full_rebuild:
+        embedded_files = _get_embedded_files()
+        current_files = {doc.metadata["file_name"] for doc in all_docs}
+        changed_docs = [
+            doc for doc in all_docs
+            if embedded_files.get(doc.metadata["file_name"], (None, []))[0] != doc.metadata["content_hash"]
+        ]
+        changed_files = {doc.metadata["file_name"] for doc in changed_docs}
+        for file_name, (_, ids) in embedded_files.items():
+            if file_name in changed_files or file_name not in current_files:
+                stale_ids.extend(ids)
+        logger.info(
+            f"{len(changed_docs)} of {len(all_docs)} files are new or changed; "
+            f"{len(stale_ids)} stale chunks will be replaced.",
+            extra=log_extra,
+        )
+        all_docs = changed_docs
+
+    # 2. Split documents into chunks
+    split_chunks = _split_documents(all_docs, parallel=parallel_split)
+
+    logger.info(f"Total documents split into {len(split_chunks)} chunks.", extra=log_extra)
+    
+    # Log chunk count per file, counted in a single pass over the chunks
+    chunk_counts = Counter(chunk.metadata["file_name"] for chunk in split_chunks)
+    for file_path, chunk_count in sorted(chunk_counts.items()):
+        logger.info(f"File '{file_path}' was split into {chunk_count} chunks.", extra=log_extra)
+
+    # 3. Initialize embedding model with a shared, keep-alive HTTP client
+    async with create_http_async_client() as http_client:
+        embeddings = get_embeddings(http_client)
+
+        # 4. Connect to the vector store, dropping the collection on a full rebuild
+        vector_store = PGVector(
+            embeddings=embeddings,
+            collection_name=COLLECTION_NAME,
+            connection=get_db_connection_string(),
+            use_jsonb=True,
+            pre_delete_collection=full_rebuild,
+            async_mode=True,
+        )
+        if stale_ids:
+            await vector_store.adelete(ids=stale_ids)
+
+        # 5. Embed and insert the chunks in batches. Each distinct chunk text is embedded
+        # once per run; identical chunks (e.g. duplicated files or boilerplate) reuse its vector.
+        vectors_by_text: dict[str, list[float]] = {}
+        for start in range(0, len(split_chunks), INSERT_BATCH_SIZE):
+            batch = split_chunks[start:start + INSERT_BATCH_SIZE]
+            texts = [chunk.page_content for chunk in batch]
+            new_texts = list(dict.fromkeys(t for t in texts if t not in vectors_by_text))
+            if new_texts:
+                vectors_by_text.update(zip(new_texts, await embeddings.aembed_documents(new_texts)))
+            await vector_store.aadd_embeddings(
+                texts=texts,
+                embeddings=[vectors_by_text[t] for t in texts],
+                metadatas=[chunk.metadata for chunk in batch],
+            )
+        if split_chunks:
+            logger.info(
+                f"Embedded {len(vectors_by_text)} distinct texts for {len(split_chunks)} chunks.",
+                extra=log_extra,
+            )
+
+    if not split_chunks:
+        logger.warning("No document chunks to embed.", extra=log_extra)
+        return 0
+
+    logger.info(
+        f"Successfully embedded and stored {len(all_docs)} files in the vector store.",
+        extra=log_extra,
+    )
+    return len(all_docs)
@@ -1,9 +1,12 @@
 import os
+import hashlib
+from typing import AsyncIterator
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from pydantic import SecretStr
 
+from src.utils.cache import TTLCache
 from src.utils.logger import get_logger
 
 # Load environment variables from both configuration files.
@@ -14,6 +17,11 @@ load_dotenv("configs/secrets/.env")
 # Initialize logger for this module
 logger = get_logger(__name__)
 
+# Summaries are keyed by a hash of the diff text, so a cached summary never goes stale;
+# the long TTL and size bound only keep memory in check.
+SUMMARY_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+SUMMARY_CACHE_MAX_SIZE = 2048
+
 class PRSummarizer:
     """
     A service class to summarize pull request diffs using an OpenAI model.
@@ -30,8 +38,25 @@ class PRSummarizer:
             raise ValueError("OPENAI_API_KEY must be set for the summarizer to work.")
 
         self.llm = ChatOpenAI(api_key=SecretStr(api_key), model="gpt-4o-mini", temperature=0.1)
+        self.summary_cache = TTLCache(ttl_seconds=SUMMARY_CACHE_TTL_SECONDS, max_size=SUMMARY_CACHE_MAX_SIZE)
         logger.info("PRSummarizer initialized successfully.")
 
+    @staticmethod
+    def _cache_key(diff_text: str) -> str:
+        return hashlib.sha256(diff_text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _build_messages(diff_text: str) -> list:
+        system_prompt = (
+            "You are an expert at summarizing code changes from a multi-line git diff. "
+            "Analyze the provided diff and create a concise summary of 2-3 sentences. "
+            "Highlight the key purpose of the changes, such as bug fixes, new features, or refactoring."
+        )
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Please summarize the following git diff:\\n\\n{diff_text}"),
+        ]
+
     def summarize_diff(self, diff_text: str, session_id: str = "anonymous") -> str:
         """
         Summarizes a given diff text using the language model.
@@ -44,31 +69,75 @@ class PRSummarizer:
             A string containing the summary of the diff.
         """
         log_extra = {"session_id": session_id}
+        cache_key = self._cache_key(diff_text)
+        cached_summary = self.summary_cache.get(cache_key)
+        if cached_summary is not None:
+            logger.info("Returning cached PR diff summary.", extra=log_extra)
+            return cached_summary
+
         logger.info("Starting PR diff summarization.", extra=log_extra)
         logger.info(
             f"Diff text length: {len(diff_text)} characters.", extra=log_extra
         )
 
-        system_prompt = (
-            "You are an expert at summarizing code changes from a multi-line git diff. "
-            "Analyze the provided diff and create a concise summary of 2-3 sentences. "
-            "Highlight the key purpose of the changes, such as bug fixes, new features, or refactoring."
-        )
+        try:
+            response = self.llm.invoke(self._build_messages(diff_text))
+            summary = str(response.content)
+            logger.info(f"Generated summary: {summary}", extra=log_extra)
+            self.summary_cache.set(cache_key, summary)
+            return summary
+        except Exception as e:
+            logger.error(f"An error occurred during summarization: {e}", extra=log_extra, exc_info=True)
+            return "Error: Could not generate a summary for the provided diff."
 
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Please summarize the following git diff:\\n\\n{diff_text}"),
-        ]
+    async def asummarize_diff(self, diff_text: str, session_id: str = "anonymous") -> str:
+        """Async version of `summarize_diff`, for use in async request handlers. Shares its cache."""
+        log_extra = {"session_id": session_id}
+        cache_key = self._cache_key(diff_text)
+        cached_summary = self.summary_cache.get(cache_key)
+        if cached_summary is not None:
+            logger.info("Returning cached PR diff summary.", extra=log_extra)
+            return cached_summary
 
+        logger.info(f"Starting PR diff summarization of {len(diff_text)} characters.", extra=log_extra)
         try:
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(self._build_messages(diff_text))
             summary = str(response.content)
             logger.info(f"Generated summary: {summary}", extra=log_extra)
+            self.summary_cache.set(cache_key, summary)
             return summary
         except Exception as e:
             logger.error(f"An error occurred during summarization: {e}", extra=log_extra, exc_info=True)
             return "Error: Could not generate a summary for the provided diff."
 
+    async def astream_diff(self, diff_text: str, session_id: str = "anonymous") -> AsyncIterator[str]:
+        """
+        Streams the summary of a diff token by token as the model generates it.
+
+        A cached summary is yielded as a single chunk, and a fully streamed summary is
+        cached for `summarize_diff` and `asummarize_diff`. Unlike those, errors are raised
+        to the caller, since part of the summary may already have been sent.
+        """
+        log_extra = {"session_id": session_id}
+        cache_key = self._cache_key(diff_text)
+        cached_summary = self.summary_cache.get(cache_key)
+        if cached_summary is not None:
+            logger.info("Returning cached PR diff summary.", extra=log_extra)
+            yield cached_summary
+            return
+
+        logger.info(f"Starting streamed PR diff summarization of {len(diff_text)} characters.", extra=log_extra)
+        chunks = []
+        async for chunk in self.llm.astream(self._build_messages(diff_text)):
+            token = str(chunk.content)
+            if token:
+                chunks.append(token)
+                yield token
+
+        summary = "".join(chunks)
+        logger.info(f"Generated summary: {summary}", extra=log_extra)
+        self.summary_cache.set(cache_key, summary)
+
 if __name__ == "__main__":
     # This block allows for direct execution of the script for testing purposes.
     try:
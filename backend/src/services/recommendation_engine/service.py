@@ -1,5 +1,5 @@
 import os
-import json
+import orjson
 from typing import List
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
@@ -171,7 +171,7 @@ Please respond with a JSON array of 2-3 message suggestions that the user can cl
 
             # Parse the JSON response
             try:
-                suggestions = json.loads(response_content)
+                suggestions = orjson.loads(response_content)
                 if not isinstance(suggestions, list):
                     raise ValueError("Response is not a list")
                 
@@ -189,7 +189,7 @@ Please respond with a JSON array of 2-3 message suggestions that the user can cl
                 logger.info(f"Generated {len(suggestions)} recommendations successfully.", extra=log_extra)
                 return suggestions
                 
-            except (json.JSONDecodeError, ValueError) as e:
+            except ValueError as e:  # includes orjson.JSONDecodeError
                 logger.warning(f"Failed to parse JSON response: {e}. Attempting to extract suggestions manually.", extra=log_extra)
                 
                 # Fallback: try to extract suggestions from the response text
@@ -0,0 +1,81 @@
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    A small thread-safe in-process cache whose entries expire after a fixed time-to-live.
+
+    Entries are evicted lazily on access, and the oldest entry is dropped once
+    `max_size` is reached. Cached values are shared between callers, so they
+    must be treated as read-only.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for `key`, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Caches `value` under `key` for the cache's time-to-live."""
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.max_size:
+                # Dicts keep insertion order, so the first key is the oldest entry
+                del self._data[next(iter(self._data))]
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def delete(self, key: Hashable) -> None:
+        """Removes `key` from the cache, if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+
+def cached(cache: TTLCache, unless: Optional[Callable[[Dict[str, Any]], bool]] = None):
+    """
+    Cache-aside decorator for async lookups.
+
+    Results are stored in `cache` under the tuple of the call's arguments (defaults
+    included), so keyword and positional calls share entries. `None` results are not
+    cached. If `unless` returns True for the bound arguments, the cache is bypassed.
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if unless is not None and unless(bound.arguments):
+                return await func(*args, **kwargs)
+
+            key = tuple(bound.arguments.values())
+            value = cache.get(key)
+            if value is None:
+                value = await func(*args, **kwargs)
+                if value is not None:
+                    cache.set(key, value)
+            return value
+
+        return wrapper
+    return decorator
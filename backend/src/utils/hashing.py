@@ -0,0 +1,6 @@
+import hashlib
+
+
+def content_hash(content: str) -> str:
+    """Returns a short, stable fingerprint of a text, used to skip unchanged or duplicate content."""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
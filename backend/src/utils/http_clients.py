@@ -0,0 +1,20 @@
+import httpx
+
+# Connection pools for the OpenAI API, shared by every chat model in the process so their
+# requests reuse the same keep-alive connections instead of each opening its own.
+OPENAI_TIMEOUT_SECONDS = 60
+OPENAI_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+openai_http_client = httpx.Client(timeout=OPENAI_TIMEOUT_SECONDS, limits=OPENAI_LIMITS)
+openai_http_async_client = httpx.AsyncClient(timeout=OPENAI_TIMEOUT_SECONDS, limits=OPENAI_LIMITS)
+
+
+def shared_openai_clients() -> dict:
+    """Keyword arguments that make a `ChatOpenAI` model send its requests through the shared pools."""
+    return {"http_client": openai_http_client, "http_async_client": openai_http_async_client}
+
+
+async def close_http_clients() -> None:
+    """Closes the shared connection pools, on application shutdown."""
+    openai_http_client.close()
+    await openai_http_async_client.aclose()
@@ -0,0 +1,36 @@
+import logging
+
+import openai
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Rate limits, dropped connections, timeouts and 5xx responses are worth retrying;
+# anything else (bad request, auth) fails immediately.
+TRANSIENT_LLM_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+LLM_RETRY_MAX_ATTEMPTS = 6
+LLM_RETRY_MAX_WAIT_SECONDS = 30
+
+
+def retry_transient_llm_errors(logger: logging.Logger):
+    """
+    Returns a retry decorator for LLM calls that backs off exponentially with jitter
+    on transient OpenAI errors, logging every retry to the given logger.
+    Works for both sync and async functions.
+    """
+    return retry(
+        wait=wait_random_exponential(multiplier=1, max=LLM_RETRY_MAX_WAIT_SECONDS),
+        stop=stop_after_attempt(LLM_RETRY_MAX_ATTEMPTS),
+        retry=retry_if_exception_type(TRANSIENT_LLM_ERRORS),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
@@ -0,0 +1,45 @@
+import base64
+import hashlib
+import hmac
+import secrets
+
+# scrypt cost parameters (about 16 MiB of memory and a few tens of milliseconds per hash)
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=64 * 1024 * 1024)
+
+
+def hash_password(password: str) -> str:
+    """
+    Hashes a password with a random salt using scrypt.
+    The result has the form `scrypt$<n>$<r>$<p>$<salt>$<hash>`, so the cost can be raised later.
+    """
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return "$".join([
+        "scrypt",
+        str(SCRYPT_N),
+        str(SCRYPT_R),
+        str(SCRYPT_P),
+        base64.b64encode(salt).decode("ascii"),
+        base64.b64encode(digest).decode("ascii"),
+    ])
+
+
+def verify_password(password: str, password_hash: str | None) -> bool:
+    """Checks a password against a hash from `hash_password`, in constant time."""
+    if not password_hash:
+        return False
+    try:
+        scheme, n, r, p, salt, expected = password_hash.split("$")
+        if scheme != "scrypt":
+            return False
+        digest = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest, base64.b64decode(expected))
@@ -0,0 +1,9 @@
+from typing import Optional
+
+import orjson
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Formats a Server-Sent Event with a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {orjson.dumps(data).decode()}\n\n"
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from src.services.agent import chat
+from src.services.agent.chat import ChatAgent
+
+
+def route(query: str) -> bool:
+    """Routes a query through the keyword router and returns whether it went to NL2SQL."""
+    state = {"messages": [HumanMessage(content=query)]}
+    return ChatAgent.route_query(SimpleNamespace(), state, {})["is_sql_query"]
+
+
+@pytest.fixture(autouse=True)
+def no_llm_fallback(monkeypatch):
+    # Unmatched queries go to the planner instead of the classifier model
+    monkeypatch.setattr(chat, "ROUTER_LLM_FALLBACK", False)
+
+
+@pytest.mark.parametrize("query", [
+    "Show my open tickets",
+    "Which Jira issues are assigned to me?",
+    "any bugs in progress",
+    "What is left in the current sprint?",
+    "List my TASKS",
+])
+def test_database_keywords_route_to_nl2sql(query):
+    assert route(query) is True
+
+
+@pytest.mark.parametrize("query", [
+    "Summarize PR 42",
+    "Show the pull request diff",
+    "What changed in the last pull-requests?",
+    "Search the documentation for onboarding",
+    "Any learnings about caching?",
+    # Tool keywords take precedence over database ones
+    "Which PRs are linked to my tickets?",
+    "Find docs for the bug tracker",
+])
+def test_tool_keywords_route_to_the_planner(query):
+    assert route(query) is False
+
+
+@pytest.mark.parametrize("query", [
+    # Keywords only match whole words
+    "Tell me about the ticketing service",
+    "How do I improve my documentary skills?",
+    "Is the address prefix configurable?",
+    "hello",
+])
+def test_unmatched_queries_go_to_the_planner_without_fallback(query):
+    assert route(query) is False
+
+
+def test_unmatched_queries_are_classified_by_the_llm_with_fallback(monkeypatch):
+    monkeypatch.setattr(chat, "ROUTER_LLM_FALLBACK", True)
+    prompts = []
+
+    class FakeRouterPrompt:
+        def __or__(self, model):
+            return model
+
+    class FakeClassifier:
+        def bind(self, **kwargs):
+            return self
+
+        def __or__(self, parser):
+            return self
+
+        def invoke(self, inputs):
+            prompts.append(inputs["user_query"])
+            return "Database"
+
+    monkeypatch.setattr(chat, "ROUTER_PROMPT", FakeRouterPrompt())
+    agent = SimpleNamespace(classifier_model=FakeClassifier())
+    state = {"messages": [HumanMessage(content="who owns the billing service?")]}
+    config = {"configurable": {"thread_id": "session-1"}}
+
+    assert ChatAgent.route_query(agent, state, config)["is_sql_query"] is True
+    assert prompts == ["who owns the billing service?"]
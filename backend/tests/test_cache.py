@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from src.utils import cache as cache_module
+from src.utils.cache import TTLCache, cached
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the cache's monotonic clock with one the test advances by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = TTLCache(ttl_seconds=10)
+    cache.set("key", "value")
+
+    clock[0] += 10
+    assert cache.get("key") == "value"
+    clock[0] += 0.1
+    assert cache.get("key") is None
+
+
+def test_set_refreshes_ttl(clock):
+    cache = TTLCache(ttl_seconds=10)
+    cache.set("key", "old")
+    clock[0] += 8
+    cache.set("key", "new")
+    clock[0] += 8
+
+    assert cache.get("key") == "new"
+
+
+def test_oldest_entry_is_evicted_at_max_size():
+    cache = TTLCache(ttl_seconds=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_overwriting_a_key_at_max_size_evicts_nothing():
+    cache = TTLCache(ttl_seconds=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") == 2
+
+
+def test_delete_and_clear():
+    cache = TTLCache(ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert cache.get("b") is None
+
+
+def make_lookup(cache: TTLCache, **decorator_kwargs):
+    calls = []
+
+    @cached(cache, **decorator_kwargs)
+    async def lookup(item_id: str, limit: int = 10, q: str = None):
+        calls.append((item_id, limit, q))
+        return None if item_id == "missing" else {"id": item_id, "limit": limit}
+
+    return lookup, calls
+
+
+def test_cached_shares_entries_between_positional_keyword_and_default_arguments():
+    cache = TTLCache(ttl_seconds=60)
+    lookup, calls = make_lookup(cache)
+
+    async def run():
+        first = await lookup("a")
+        assert await lookup("a", 10) is first
+        assert await lookup(item_id="a", limit=10) is first
+        await lookup("a", limit=20)
+
+    asyncio.run(run())
+
+    assert calls == [("a", 10, None), ("a", 20, None)]
+    assert cache.get(("a", 10, None)) == {"id": "a", "limit": 10}
+
+
+def test_cached_does_not_store_none():
+    cache = TTLCache(ttl_seconds=60)
+    lookup, calls = make_lookup(cache)
+
+    async def run():
+        assert await lookup("missing") is None
+        assert await lookup("missing") is None
+
+    asyncio.run(run())
+
+    assert len(calls) == 2
+
+
+def test_cached_bypasses_the_cache_when_unless_matches():
+    cache = TTLCache(ttl_seconds=60)
+    lookup, calls = make_lookup(cache, unless=lambda args: bool(args["q"]))
+
+    async def run():
+        await lookup("a", q="term")
+        await lookup("a", q="term")
+        await lookup("a")
+        await lookup("a")
+
+    asyncio.run(run())
+
+    assert calls == [("a", 10, "term"), ("a", 10, "term"), ("a", 10, None)]
+    assert cache.get(("a", 10, "term")) is None
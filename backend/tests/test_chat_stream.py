@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+import pytest
+
+# basic_auth requires credentials at import time
+os.environ.setdefault("BASIC_AUTH_USER", "test-user")
+os.environ.setdefault("BASIC_AUTH_PASS", "test-pass")
+
+from fastapi import FastAPI
+from starlette.requests import ClientDisconnect
+
+from src.apis.deps.basic_auth import basic_auth_dependency
+from src.apis.routes import chat_routes
+
+
+class FakeAgent:
+    async def astream(self, **kwargs):
+        for token in ("Hello", " world"):
+            yield token
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(chat_routes.router, prefix="/chat")
+    app.dependency_overrides[basic_auth_dependency] = lambda: "test-user"
+    return app
+
+
+async def free_agent_slots() -> int:
+    """Counts the agent slots that can be taken right now, then gives them back."""
+    taken = 0
+    while not chat_routes.agent_semaphore.locked():
+        await chat_routes.agent_semaphore.acquire()
+        taken += 1
+    for _ in range(taken):
+        chat_routes.agent_semaphore.release()
+    return taken
+
+
+def make_scope() -> dict:
+    # ASGI spec 2.4, as advertised by current uvicorn: Starlette then skips background tasks
+    # when sending fails
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/chat/agent/stream",
+        "raw_path": b"/chat/agent/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+@pytest.mark.parametrize("failing_message", ["http.response.start", "http.response.body"])
+def test_stream_releases_agent_slot_when_client_disconnects(monkeypatch, failing_message):
+    stored_replies = []
+    user_message_stored = []
+
+    async def fake_start_chat_turn(request):
+        async def store_user_message():
+            user_message_stored.append(request.query)
+        return "session-1", [], asyncio.create_task(store_user_message())
+
+    async def fake_store_message(**kwargs):
+        stored_replies.append(kwargs)
+
+    monkeypatch.setattr(chat_routes, "get_agent", lambda: FakeAgent())
+    monkeypatch.setattr(chat_routes, "start_chat_turn", fake_start_chat_turn)
+    monkeypatch.setattr(chat_routes.db_ops, "astore_message", fake_store_message)
+
+    async def run():
+        messages = [{"type": "http.request", "body": b'{"user_id": "u1", "query": "hi"}', "more_body": False}]
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            # The client goes away: the first token (or the response start) can't be delivered
+            if message["type"] == failing_message and message.get("body", b"x"):
+                raise OSError("client disconnected")
+
+        try:
+            await make_app()(make_scope(), receive, send)
+        except (ClientDisconnect, OSError):
+            pass
+        return await free_agent_slots()
+
+    assert asyncio.run(run()) == chat_routes.AGENT_CONCURRENCY
+    assert user_message_stored == ["hi"]
+    # The reply was never completed, so it isn't stored
+    assert stored_replies == []
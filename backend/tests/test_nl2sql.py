@@ -0,0 +1,85 @@
+import pytest
+
+from src.services.agent.nl2sql import query_signature, validate_generated_sql
+
+USER_FILTER = "WHERE assigned_to = :user_id"
+
+
+@pytest.mark.parametrize("query", [
+    f"SELECT id, title FROM jira_tickets {USER_FILTER}",
+    f"select id from jira_tickets {USER_FILTER};",
+    f"  SELECT id FROM jira_tickets {USER_FILTER} ;  ",
+    f"WITH mine AS (SELECT id FROM jira_tickets {USER_FILTER}) SELECT count(*) FROM mine",
+    f"SELECT * FROM jira_tickets {USER_FILTER} AND title ILIKE '%update%'",
+    f"SELECT * FROM jira_tickets {USER_FILTER} AND title = 'drop; delete'",
+    f"SELECT * FROM jira_tickets {USER_FILTER} AND description LIKE 'it''s; done'",
+    f"SELECT id, updated_at, last_update FROM jira_tickets {USER_FILTER}",
+    # Columns named after SQL keywords
+    f"SELECT lock, call, copy, grant FROM jira_tickets {USER_FILTER}",
+    f'SELECT "update", "delete" FROM jira_tickets {USER_FILTER}',
+    f"SELECT id FROM jira_tickets {USER_FILTER} -- open tickets; newest first",
+    f"SELECT id FROM jira_tickets /* mine */ {USER_FILTER}",
+])
+def test_accepts_read_only_queries_for_the_current_user(query):
+    assert validate_generated_sql(query) is None
+
+
+@pytest.mark.parametrize("query", [
+    f"SELECT id FROM jira_tickets {USER_FILTER}; DROP TABLE users",
+    f"SELECT id FROM jira_tickets {USER_FILTER}; SELECT 1",
+    f"SELECT id FROM jira_tickets {USER_FILTER} /* ; */; SELECT 1",
+])
+def test_rejects_multiple_statements(query):
+    assert validate_generated_sql(query) == "only a single statement is allowed"
+
+
+@pytest.mark.parametrize("query", [
+    f"UPDATE jira_tickets SET status = 'Done' {USER_FILTER}",
+    f"DELETE FROM jira_tickets {USER_FILTER}",
+    "DROP TABLE users",
+    f"-- harmless\nDELETE FROM jira_tickets {USER_FILTER}",
+    f"EXPLAIN ANALYZE SELECT id FROM jira_tickets {USER_FILTER}",
+])
+def test_rejects_statements_other_than_select(query):
+    assert validate_generated_sql(query) == "only SELECT queries are allowed"
+
+
+@pytest.mark.parametrize("query", [
+    f"WITH gone AS (DELETE FROM jira_tickets {USER_FILTER} RETURNING id) SELECT * FROM gone",
+    f"WITH mine AS (SELECT id FROM jira_tickets {USER_FILTER}) UPDATE jira_tickets SET status = 'Done'",
+    f"SELECT id INTO stolen FROM users {USER_FILTER}",
+    f"SELECT id FROM jira_tickets {USER_FILTER} FOR UPDATE",
+    f"SELECT id FROM jira_tickets {USER_FILTER} FOR NO KEY UPDATE",
+    f"SELECT id FROM jira_tickets {USER_FILTER} FOR SHARE",
+    f"SELECT id FROM jira_tickets {USER_FILTER} FOR KEY SHARE",
+])
+def test_rejects_queries_that_modify_or_lock_data(query):
+    assert validate_generated_sql(query) == "the query must not modify data"
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT id FROM jira_tickets",
+    "SELECT id FROM jira_tickets WHERE assigned_to = ':user_id'",
+    "SELECT id FROM jira_tickets -- WHERE assigned_to = :user_id",
+    "SELECT id FROM jira_tickets /* :user_id */",
+    "SELECT id FROM jira_tickets WHERE assigned_to = :user_ids",
+    "SELECT id FROM jira_tickets WHERE assigned_to::user_id",
+])
+def test_rejects_queries_without_the_user_parameter(query):
+    assert validate_generated_sql(query) == "the query must be restricted to the current user with :user_id"
+
+
+def test_signature_ignores_case_punctuation_and_filler_words():
+    assert query_signature("Show me my open tickets!") == ("open", "tickets")
+    assert query_signature("what are   OPEN tickets?") == ("open", "tickets")
+
+
+def test_signature_keeps_word_order_negations_and_quantities():
+    assert query_signature("tickets not done") == ("tickets", "not", "done")
+    assert query_signature("done tickets") != query_signature("tickets not done")
+    assert query_signature("top 5 tickets") != query_signature("top 10 tickets")
+
+
+def test_signature_keeps_uuids_whole():
+    ticket_id = "3f2b9c1e-8d4a-4b6f-9e2d-1a7c5b3e9f01"
+    assert query_signature(f"PRs for ticket {ticket_id.upper()}") == ("prs", "ticket", ticket_id)